@@ -0,0 +1,132 @@
+# Lexer and parser throughput benchmark over synthetic workloads.
+#
+#   python benchmarks/frontend.py [--shapes flat,nested] [--sizes 1000,10000]
+#                                 [--save-baseline] [--compare] [--threshold 15]
+#
+# Times Lexer.lex() and Parser.parse() on every shape and size from
+# benchmarks/workloads.py, best of a few runs, and measures their peak python
+# memory in a separate traced run so tracing never skews the timings.
+# --compare checks the results against a saved baseline and exits non-zero
+# when any throughput drops by more than the threshold, which is how CI
+# catches a slower lexer or parser. Baselines are only comparable on the
+# machine that recorded them.
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from collections.abc import Callable
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.workloads import WORKLOADS
+from lib.frontend.source import Source
+from lib.frontend.lexer import Lexer
+from lib.frontend.parser import Parser
+
+BASELINE: str = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+def best(function: Callable[[], object], repeat: int) -> float:
+    timings: list[float] = []
+    for _ in range(repeat):
+        gc.collect()
+        start: float = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def peak(function: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(shape: str, size: int, repeat: int) -> dict[str, float]:
+    source: Source = Source(WORKLOADS[shape](size, 0), f"{shape}-{size}.finn")
+    tokens: list = Lexer(source).lex()
+    statements: int = len(Parser(tokens).parse())
+
+    lex: float = best(lambda: Lexer(source).lex(), repeat)
+    parse: float = best(lambda: Parser(tokens).parse(), repeat)
+    return {
+        "bytes": len(source.text),
+        "tokens": len(tokens),
+        "statements": statements,
+        "lex_seconds": lex,
+        "parse_seconds": parse,
+        "lex_bytes_per_second": len(source.text) / lex,
+        "lex_tokens_per_second": len(tokens) / lex,
+        "parse_tokens_per_second": len(tokens) / parse,
+        "lex_peak_bytes": peak(lambda: Lexer(source).lex()),
+        "parse_peak_bytes": peak(lambda: Parser(tokens).parse())
+    }
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float) -> list[str]:
+    regressions: list[str] = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric in ("lex_tokens_per_second", "parse_tokens_per_second"):
+            change: float = result[metric] / baseline[key][metric] - 1
+            print(f"  {key:<18}{metric:<26}{change * 100:+8.1f}%")
+            if change < -threshold / 100:
+                regressions.append(f"{key} {metric} {change * 100:+.1f}%")
+        for metric in ("lex_peak_bytes", "parse_peak_bytes"):
+            change = result[metric] / max(baseline[key][metric], 1) - 1
+            if change > threshold / 100:
+                regressions.append(f"{key} {metric} {change * 100:+.1f}%")
+    return regressions
+
+def main() -> None:
+    arguments = ArgumentParser(description = "Measure lexer and parser throughput on synthetic workloads")
+    arguments.add_argument("--shapes", default = ",".join(WORKLOADS), help = "comma separated workload shapes")
+    arguments.add_argument("--sizes", default = "1000,10000,100000", help = "comma separated sizes, in lines or nesting depth")
+    arguments.add_argument("-n", "--repeat", type = int, default = 5, help = "timed runs per measurement, the best one counts")
+    arguments.add_argument("--baseline", default = BASELINE, help = "baseline file to save or compare against")
+    arguments.add_argument("--save-baseline", action = "store_true")
+    arguments.add_argument("--compare", action = "store_true", help = "exit 1 if anything regressed past the threshold")
+    arguments.add_argument("--threshold", type = float, default = 15.0, help = "allowed regression in percent")
+    arguments.add_argument("--json", help = "also write the results to this file")
+    options = arguments.parse_args()
+
+    results: dict[str, dict[str, float]] = {}
+    print(f"{'workload':<18}{'bytes':>12}{'tokens':>10}{'lex MB/s':>10}{'lex Mtok/s':>12}{'parse Mtok/s':>14}{'lex peak KiB':>14}{'parse peak KiB':>16}")
+    for shape in options.shapes.split(","):
+        for size in (int(size) for size in options.sizes.split(",")):
+            key: str = f"{shape}/{size}"
+            result: dict[str, float] = measure(shape, size, options.repeat)
+            results[key] = result
+            print(f"{key:<18}{result['bytes']:>12}{result['tokens']:>10}"
+                  f"{result['lex_bytes_per_second'] / 1e6:>10.2f}{result['lex_tokens_per_second'] / 1e6:>12.3f}"
+                  f"{result['parse_tokens_per_second'] / 1e6:>14.3f}"
+                  f"{result['lex_peak_bytes'] / 1024:>14.1f}{result['parse_peak_bytes'] / 1024:>16.1f}")
+
+    if options.json:
+        with open(options.json, "w") as file:
+            json.dump(results, file, indent = 2)
+
+    if options.save_baseline:
+        with open(options.baseline, "w") as file:
+            json.dump(results, file, indent = 2)
+        print(f"baseline saved to {options.baseline}")
+
+    if options.compare:
+        with open(options.baseline, "r") as file:
+            baseline: dict[str, dict[str, float]] = json.load(file)
+        print(f"against {options.baseline}:")
+        regressions: list[str] = compare(results, baseline, options.threshold)
+        if regressions:
+            print("regressions past the threshold:")
+            for regression in regressions:
+                print(f"  {regression}")
+            exit(1)
+        print("no regressions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Startup benchmark for finn.py.
+#
+#   python benchmarks/startup.py [file.finn] [-n RUNS] [--top N]
+#
+# Runs the frontend in fresh interpreters under -X importtime and reports the
+# wall time of each run plus the slowest imports, so heavy modules creeping
+# back onto the startup path show up immediately.
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from statistics import median
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run(path: str) -> tuple[float, dict[str, int]]:
+    start: float = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", os.path.join(ROOT, "finn.py"), path, "--no-cache"], cwd = ROOT, capture_output = True, text = True)
+    elapsed: float = time.perf_counter() - start
+
+    # "import time: self [us] | cumulative | imported package", where nesting
+    # is shown by indenting the package name
+    imports: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if not name.startswith("  "):
+            imports[name.strip()] = int(cumulative)
+    return (elapsed, imports)
+
+def main() -> None:
+    arguments = ArgumentParser(description = "Measure finn.py startup time")
+    arguments.add_argument("file", nargs = "?", help = "source to compile, defaults to a one line program")
+    arguments.add_argument("-n", "--runs", type = int, default = 20)
+    arguments.add_argument("--top", type = int, default = 10, help = "how many top level imports to list")
+    options = arguments.parse_args()
+
+    path: str | None = options.file
+    if path is None:
+        handle, path = tempfile.mkstemp(suffix = ".finn")
+        with os.fdopen(handle, "w") as file:
+            file.write("let a := 1;\n")
+
+    try:
+        run(path) # warm the bytecode and page caches
+        results: list[tuple[float, dict[str, int]]] = [run(path) for _ in range(options.runs)]
+    finally:
+        if options.file is None:
+            os.remove(path)
+
+    walls: list[float] = [wall for wall, _ in results]
+    print(f"wall time over {options.runs} runs: median {median(walls) * 1000:.1f} ms, min {min(walls) * 1000:.1f} ms, max {max(walls) * 1000:.1f} ms")
+
+    modules: set[str] = set().union(*(imports for _, imports in results))
+    times: dict[str, float] = { module: median(imports.get(module, 0) for _, imports in results) for module in modules }
+    print(f"import time, median cumulative, top {options.top}:")
+    for module, microseconds in sorted(times.items(), key = lambda item: item[1], reverse = True)[:options.top]:
+        print(f"  {microseconds / 1000:8.2f} ms  {module}")
+
+if __name__ == "__main__":
+    main()
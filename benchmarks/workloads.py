@@ -0,0 +1,76 @@
+# Synthetic .finn programs for the frontend benchmarks.
+#
+# Every generator takes a size and a seed and returns source text that lexes
+# and parses cleanly, scaling linearly with size so throughput numbers are
+# comparable across sizes. The shapes stress different parts of the
+# frontend: flat declarations are the common case, nested expressions the
+# parser's operand stack, comments the lexer's skip paths and numeric tables
+# the number rule and long lexemes.
+import random
+from collections.abc import Callable
+
+TYPES: tuple[str, ...] = ("i8", "i16", "i32", "i64", "u8", "u16", "u32", "u64", "f32", "f64")
+OPERATORS: tuple[str, ...] = ("+", "-", "*", "/", "<<", ">>", "==", "!=", "<", ">=")
+
+def flat(size: int, seed: int = 0) -> str:
+    # one declaration, reassignment or expression statement per line
+    rng: random.Random = random.Random(seed)
+    lines: list[str] = []
+    for index in range(size):
+        match index % 4:
+            case 0:
+                lines.append(f"let value{index}: {rng.choice(TYPES)} = {rng.randint(0, 1000)};")
+            case 1:
+                lines.append(f"const limit{index} := value{index - 1} {rng.choice(OPERATORS)} {rng.randint(1, 99)};")
+            case 2:
+                lines.append(f"value{index - 2} = -value{index - 2} * (limit{index - 1} + {rng.randint(0, 9)});")
+            case 3:
+                lines.append(f"value{index - 3}++ + limit{index - 2} ** 2;")
+    return "\n".join(lines) + "\n"
+
+def nested(size: int, seed: int = 0) -> str:
+    # a single expression nested size levels deep, alternating groupings,
+    # prefix chains and binary operators
+    rng: random.Random = random.Random(seed)
+    opening: list[str] = []
+    closing: list[str] = []
+    for _ in range(size):
+        opening.append(rng.choice(("(", "-(", "(- ", "(x + ")))
+        closing.append(f" {rng.choice(OPERATORS)} {rng.randint(0, 9)})" if opening[-1] != "(x + " else ")")
+    return f"let x := 1;\nlet deep := {''.join(opening)}1{''.join(reversed(closing))};\n"
+
+def comments(size: int, seed: int = 0) -> str:
+    # mostly comments, line and block, with a statement every few lines
+    rng: random.Random = random.Random(seed)
+    words: tuple[str, ...] = ("the", "lexer", "skips", "all", "of", "this", "text", "quickly", "//", "*", "/")
+    lines: list[str] = []
+    for index in range(size):
+        match index % 5:
+            case 0 | 1:
+                lines.append("// " + " ".join(rng.choice(words) for _ in range(rng.randint(4, 16))))
+            case 2:
+                lines.append("/* " + " ".join(rng.choice(words) for _ in range(rng.randint(4, 16))))
+            case 3:
+                lines.append("   " + " ".join(rng.choice(words) for _ in range(rng.randint(2, 8))) + " */")
+            case 4:
+                lines.append(f"let note{index} := {rng.randint(0, 100)}; // trailing {index}")
+    return "\n".join(lines) + "\n"
+
+def numbers(size: int, seed: int = 0) -> str:
+    # a table of wide integer and float constants, the shape of generated
+    # lookup tables and bit masks
+    rng: random.Random = random.Random(seed)
+    lines: list[str] = []
+    for index in range(size):
+        if index % 2:
+            lines.append(f"const entry{index}: f64 = {rng.randint(0, 10 ** 9)}.{rng.randint(0, 10 ** 15):015d};")
+        else:
+            lines.append(f"const entry{index}: u64 = {rng.randint(0, 2 ** 64 - 1)};")
+    return "\n".join(lines) + "\n"
+
+WORKLOADS: dict[str, Callable[[int, int], str]] = {
+    "flat"     : flat,
+    "nested"   : nested,
+    "comments" : comments,
+    "numbers"  : numbers
+}
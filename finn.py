@@ -1,19 +1,41 @@
 # type: ignore
-from importlib.util import find_spec
+def require_llvmlite() -> None:
+    # only codegen needs llvmlite, so a frontend-only run never looks for
+    # it. status goes to stderr, stdout is the ir or the program's result.
+    from importlib.util import find_spec
 
-if find_spec("llvmlite") is None:
-    print("[ ERR ] LLVMLite : Attempting to install llvmlite")
-    from subprocess import call
-    call("pip install llvmlite")
-    call(f"python {__file__}")
-else:
-    print("[ OK ] LLVMLite")
+    if find_spec("llvmlite") is None:
+        print("[ ERR ] LLVMLite : Attempting to install llvmlite", file = stderr)
+        from subprocess import call
+        call("pip install llvmlite")
+        call(f"python {__file__}")
+    else:
+        print("[ OK ] LLVMLite", file = stderr)
 
-from sys import argv
-from os.path import exists
+from sys import argv, stderr
+from collections.abc import Iterator
+from os.path import abspath, exists, isdir, relpath
 
 init: bool = False
+project: bool = False
+emit_ir: bool = False
+run: bool = False
+level: str | None = None
+time_passes: bool = False
 time: bool = False
+time_json: str = ""
+trace_memory: bool = True
+profile: str = ""
+profile_dir: str = "profile"
+profile_interval: float = 1.0
+workers: int | None = None
+cache: bool = True
+cache_dir: str = ""
+serve: bool = False
+stop: bool = False
+daemon: bool = False
+socket_path: str = ""
+parallel_lex: bool = False
 
 path: str = ""
 
@@ -24,9 +46,66 @@ for arg in argv:
         case "init":
             init = True
 
+        case "project":
+            project = True
+
+        case "ir":
+            emit_ir = True
+
+        case "run":
+            run = True
+
+        case "serve":
+            serve = True
+
+        case "--stop":
+            stop = True
+
+        case "--daemon":
+            daemon = True
+
+        case "--parallel-lex":
+            parallel_lex = True
+
+        case _ if arg.startswith("--socket="):
+            socket_path = arg.removeprefix("--socket=")
+
+        case _ if arg.startswith("-j") and arg[2:].isdigit():
+            workers = int(arg[2:])
+
         case "-t":
             time = True
 
+        case _ if arg.startswith("--time-json="):
+            time_json = arg.removeprefix("--time-json=")
+
+        case "--no-tracemalloc":
+            trace_memory = False
+
+        case "--profile":
+            profile = "cprofile"
+
+        case "--profile=cprofile" | "--profile=sample" | "--profile=all":
+            profile = arg.removeprefix("--profile=")
+
+        case _ if arg.startswith("--profile-dir="):
+            profile_dir = arg.removeprefix("--profile-dir=")
+
+        case _ if arg.startswith("--profile-interval=") and arg.removeprefix("--profile-interval=").replace(".", "", 1).isdigit():
+            profile_interval = float(arg.removeprefix("--profile-interval="))
+
+        case "-O0" | "-O1" | "-O2" | "-O3" | "-Os":
+            level = arg
+
+        case "--time-passes":
+            time_passes = True
+
+        case "--no-cache":
+            cache = False
+
+        case _ if arg.startswith("--cache-dir="):
+            cache_dir = arg.removeprefix("--cache-dir=")
+
         case _:
             if exists(arg):
                 path = arg
@@ -34,14 +113,209 @@ for arg in argv:
                 print(f"Invalid command: \"{arg}\"")
                 exit(1)
 
-from lib.frontend.token import Token
+if serve or daemon:
+    from lib.daemon import default_socket, request
+
+    socket_path = socket_path or default_socket()
+    if serve and stop:
+        exit(0 if request(socket_path, { "mode": "stop" }) is not None else 1)
+    if serve:
+        from lib.daemon import serve as serve_forever
+        from lib.frontend.cache import default_directory
+
+        serve_forever(socket_path, workers, (cache_dir or default_directory()) if cache else None)
+        exit(0)
+
+    # the daemon has no per-run metrics, profiles or project builds, those
+    # always compile here
+    if path and not (project or isdir(path) or time or time_json or profile or time_passes):
+        response: dict | None = request(socket_path, { "mode": "run" if run else "ir" if emit_ir else "tree", "path": abspath(path), "level": level })
+        if response is not None:
+            print(response["output"], end = "")
+            exit(response["status"])
+
+from lib.frontend.token import Token, TokenBuffer
+from lib.frontend.source import Source
 from lib.frontend.lexer import Lexer
 from lib.frontend.parser import Parser
+from lib.frontend.arena import AstArena
+from lib.frontend.cache import DiskCache, FrontendCache, default_directory
+from lib.frontend.metrics import Metrics
+from lib.frontend.errors import Diagnostics
+
+profiler = None
+if profile:
+    from lib.frontend.profiling import Profiler
+
+    # cprofile counts every call, sample takes the whole stack every
+    # interval in milliseconds, all runs both
+    profiler = Profiler(profile != "sample", profile_interval / 1000 if profile != "cprofile" else None)
+
+metrics: Metrics = Metrics(time or bool(time_json), trace_memory, profiler)
+
+def report_metrics() -> None:
+    if profiler:
+        profiler.finish()
+        print(profiler.summary(), file = stderr)
+        for written in profiler.write(profile_dir):
+            print(f"[ OK ] Profile : {written}", file = stderr)
+    if time:
+        print(metrics.report(), file = stderr)
+    if time_json == "-":
+        print(metrics.to_json())
+    elif time_json:
+        with open(time_json, "w") as file:
+            file.write(metrics.to_json())
+
+if project or isdir(path):
+    from lib.frontend.project import Project
+
+    build: Project = Project(path, workers, (cache_dir or default_directory()) if cache else None)
+    with metrics.phase("project") as phase:
+        modules: list = build.compile()
+        phase.count(modules = len(modules), bytes = sum(len(module.arena.tokens.source.text) for module in modules), nodes = sum(len(module.arena) for module in modules))
+    if build.diagnostics:
+        # every module is parsed either way, so all of their errors show
+        build.diagnostics.render()
+        report_metrics()
+        exit(1)
+    with metrics.phase("print"):
+        for module in modules:
+            print(f"Module({relpath(module.filename, build.root)})")
+            module.arena.pprint()
+    for filename, missing in build.unresolved:
+        print(f"[ ERR ] {relpath(filename, build.root)} : Could not resolve import \"{missing}\"")
+    report_metrics()
+    exit(1 if build.unresolved else 0)
+
+with metrics.phase("read") as phase:
+    source: Source = Source.open(path)
+    phase.count(bytes = len(source.text))
+
+def load_statements() -> list:
+    # constant folding is an optimization, so -O0 sees the tree as parsed
+    from lib.frontend.resolver import Resolver
+
+    arena: AstArena = load_arena()
+    with metrics.phase("tree") as phase:
+        statements: list = arena.to_ast()
+        phase.count(nodes = len(arena))
+    with metrics.phase("resolve") as phase:
+        # every undefined name is reported at once, before codegen runs
+        diagnostics: Diagnostics = Diagnostics()
+        bindings: dict = Resolver(diagnostics).resolve(statements)
+        phase.count(names = len(bindings))
+    if diagnostics:
+        diagnostics.render()
+        report_metrics()
+        exit(1)
+    if level == "-O0":
+        return statements
+    from lib.frontend.fold import ConstantFolder
+
+    with metrics.phase("fold") as phase:
+        folder: ConstantFolder = ConstantFolder()
+        statements = folder.fold(statements)
+        phase.count(nodes = len(arena), folded = folder.folded, propagated = folder.propagated)
+    return statements
+
+def load_arena() -> AstArena:
+    # only runs when something needs the tree, a warm jit cache skips it
+    frontend_cache: FrontendCache | None = FrontendCache(DiskCache(cache_dir or default_directory())) if cache else None
+    arena: AstArena | None = None
+    if frontend_cache:
+        with metrics.phase("cache load") as phase:
+            arena = frontend_cache.load(source)
+            if arena is not None:
+                phase.count(nodes = len(arena))
+
+    if arena is None:
+        # every lexer and parser error is collected and printed together
+        diagnostics: Diagnostics = Diagnostics()
+        arena = AstArena(TokenBuffer(source))
+        if metrics.detailed or parallel_lex:
+            # lexing is timed on its own here, so it fills a whole buffer
+            # before parsing starts instead of streaming into the parser.
+            # parallel lexing always does, its chunks finish out of order.
+            with metrics.phase("lex") as phase:
+                if parallel_lex:
+                    from lib.frontend.lexer import lex_parallel
+
+                    buffer: TokenBuffer = lex_parallel(source, workers, diagnostics)
+                else:
+                    buffer = Lexer(source, diagnostics = diagnostics).lex_buffer()
+                phase.count(bytes = len(source.text), tokens = len(buffer))
+            with metrics.phase("parse") as phase:
+                for guh in Parser(buffer, diagnostics).iter_parse():
+                    arena.add(guh)
+                phase.count(tokens = len(buffer), nodes = len(arena))
+        else:
+            tokens: Iterator[Token] = Lexer(source, diagnostics = diagnostics).iter_tokens()
+            for guh in Parser(tokens, diagnostics).iter_parse():
+                arena.add(guh)
+        if diagnostics:
+            diagnostics.render()
+            report_metrics()
+            exit(1)
+        if frontend_cache:
+            with metrics.phase("cache store"):
+                frontend_cache.store(source, arena)
+    return arena
+
+def generate_module() -> tuple:
+    from lib.backend.codegen import CodeGenerator
+
+    try:
+        statements: list = load_statements()
+        with metrics.phase("codegen") as phase:
+            gen: CodeGenerator = CodeGenerator(path)
+            module = gen.generate(statements)
+            if metrics.enabled:
+                phase.count(instructions = sum(len(block.instructions) for function in module.functions for block in function.blocks))
+    except RecursionError:
+        # folding and codegen recurse into expressions, which the parser and
+        # resolver build and walk to any depth
+        print(f"[ ERR ] {path} : Expression nested too deeply")
+        report_metrics()
+        exit(1)
+    return (module, gen.result_type)
+
+if emit_ir or run:
+    require_llvmlite()
+    from lib.backend.passes import Optimizer
+
+    # ir is printed as codegen emits it unless a level is given, run
+    # defaults to -O2
+    optimizer: Optimizer | None = Optimizer(level or "-O2", time_passes) if run or level or time_passes else None
+
+    if emit_ir:
+        module, _ = generate_module()
+        if optimizer:
+            with metrics.phase("optimize"):
+                module = optimizer.prepare(module)
+        print(module)
+    else:
+        from lib.backend.jit import JitEngine
+
+        engine: JitEngine = JitEngine(optimizer, DiskCache(cache_dir or default_directory()) if cache else None)
+        with metrics.phase("jit cache"):
+            loaded = engine.cached(source)
+        if loaded is None:
+            module, result_type = generate_module()
+            with metrics.phase("optimize"):
+                prepared = engine.prepare(module, result_type, source)
+            with metrics.phase("jit"):
+                loaded = engine.add(prepared, path, result_type)
+        with metrics.phase("run"):
+            result = loaded.run()
+        if result is not None:
+            print(result)
+
+    for name, report in (optimizer.reports if optimizer else []):
+        print(f"Pass timing for {name}:\n{report}")
+else:
+    arena: AstArena = load_arena()
+    with metrics.phase("print"):
+        arena.pprint()
 
-with open(path, "r") as file:
-    contents: str = file.read()
-    lines: list[str] = contents.splitlines()
-    tokens: list[Token] = Lexer(contents, path, lines).lex()
-    expr = Parser(tokens, lines).parse()
-    for guh in expr:
-        guh.pprint()
\ No newline at end of file
+report_metrics()
\ No newline at end of file
@@ -0,0 +1,281 @@
+# type: ignore
+from llvmlite import ir
+
+from ..frontend.token import Token, TokenType
+from ..frontend.expr import Expr, Stmt
+from ..frontend.types import FinnType, lookup_type, literal_type
+from ..frontend.errors import ErrorPrinter
+
+ENTRY: str = "main"
+RESULT: str = "result"
+
+class Variable:
+
+    __slots__ = ("pointer", "type", "const", "name")
+
+    def __init__(self, pointer: ir.AllocaInstr, finn_type: FinnType, const: bool, name: Token) -> None:
+        self.pointer: ir.AllocaInstr = pointer
+        self.type: FinnType = finn_type
+        self.const: bool = const
+        self.name: Token = name
+
+
+class CodeGenerator:
+
+    # owns the module and builder while the node classes' codegen methods walk
+    # the tree. every value is passed around as (ir value, finn type), since
+    # llvm integers carry no signedness and the finn type decides which
+    # instruction an operator lowers to.
+    def __init__(self, name: str) -> None:
+        self.module: ir.Module = ir.Module(name = name)
+        self.builder: ir.IRBuilder = None
+        self.allocator: ir.IRBuilder = None
+        self.function: ir.Function = None
+        self.scopes: list[dict[int, Variable]] = []
+        self.result_type: FinnType | None = None
+
+        # the closest token to whatever is being emitted, since literals keep
+        # none of their own to point an error at
+        self.token: Token = None
+
+    def error(self, message: str, token: Token | None = None) -> None:
+        token = token or self.token
+        if token is None:
+            # nothing with a token has been emitted yet, so there is no
+            # line to point at
+            print(f"[ ERR ] {self.module.name} : {message}")
+            exit(1)
+        ErrorPrinter(message, token).print_error()
+        exit(1)
+
+    def at(self, token: Token) -> None:
+        self.token = token
+
+    # region "Types"
+    def lltype(self, finn_type: FinnType) -> ir.Type:
+        if finn_type.is_float:
+            return ir.FloatType() if finn_type.bits == 32 else ir.DoubleType()
+        return ir.IntType(finn_type.bits)
+
+    def resolve_type(self, types: list[Expr]) -> FinnType:
+        if len(types) > 1:
+            self.error("Union types are not supported by codegen", types[1].name if isinstance(types[1], Expr.Variable) else None)
+        annotation: Expr = types[0]
+        if not isinstance(annotation, Expr.Variable):
+            self.error("Expected a type name")
+        finn_type: FinnType | None = lookup_type(annotation.name.lexeme)
+        if finn_type is None:
+            self.error(f"Unknown type \"{annotation.name.lexeme}\"", annotation.name)
+        return finn_type
+
+    def check(self, value: tuple[ir.Value, FinnType], expected: FinnType | None) -> tuple[ir.Value, FinnType]:
+        # no implicit conversions, an operand has exactly the type asked for
+        if expected is not None and value[1] is not expected:
+            self.error(f"Expected a value of type {expected}, found {value[1]}")
+        return value
+
+    def constant(self, finn_type: FinnType, value: int | float | bool) -> tuple[ir.Value, FinnType]:
+        return (ir.Constant(self.lltype(finn_type), value), finn_type)
+
+    def number(self, lexeme: str, expected: FinnType | None, negate: bool = False) -> tuple[ir.Value, FinnType]:
+        finn_type: FinnType = expected or literal_type(lexeme)
+        if finn_type.is_bool:
+            self.error(f"Expected a value of type bool, found {'-' if negate else ''}{lexeme}")
+        if finn_type.is_float:
+            return self.constant(finn_type, -float(lexeme) if negate else float(lexeme))
+        if "." in lexeme:
+            self.error(f"Float literal {lexeme} cannot be used as {finn_type}")
+
+        value: int = -int(lexeme) if negate else int(lexeme)
+        if not finn_type.fits(value):
+            self.error(f"Literal {value} does not fit in {finn_type}")
+        return self.constant(finn_type, value)
+    # endregion
+
+    # region "Scopes"
+    def declare(self, name: Token, finn_type: FinnType, const: bool) -> Variable:
+        # allocas go in the entry block, which holds nothing else, so mem2reg
+        # can promote every one of them
+        variable: Variable = Variable(self.allocator.alloca(self.lltype(finn_type), name = name.lexeme), finn_type, const, name)
+        self.scopes[-1][name.symbol] = variable
+        return variable
+
+    def lookup(self, name: Token) -> Variable:
+        for scope in reversed(self.scopes):
+            variable: Variable | None = scope.get(name.symbol)
+            if variable is not None:
+                return variable
+        self.error(f"Undefined variable \"{name.lexeme}\"", name)
+
+    def lookup_type(self, name: Token) -> FinnType | None:
+        for scope in reversed(self.scopes):
+            variable: Variable | None = scope.get(name.symbol)
+            if variable is not None:
+                return variable.type
+        return None
+
+    def block(self, body: list[Stmt] | Stmt) -> None:
+        self.scopes.append({})
+        for statement in (body if isinstance(body, list) else [body]):
+            statement.codegen(self)
+        self.scopes.pop()
+    # endregion
+
+    # region "Operators"
+    def arithmetic(self, operator: Token, left: ir.Value, right: ir.Value, finn_type: FinnType) -> ir.Value:
+        builder: ir.IRBuilder = self.builder
+        token_type: TokenType = operator.token_type
+
+        if finn_type.is_bool:
+            self.error(f"Operator {operator.lexeme} is not defined for bool", operator)
+
+        if finn_type.is_float:
+            match token_type:
+                case TokenType.PLUS:
+                    return builder.fadd(left, right)
+                case TokenType.MINUS:
+                    return builder.fsub(left, right)
+                case TokenType.MULT:
+                    return builder.fmul(left, right)
+                case TokenType.DIV:
+                    return builder.fdiv(left, right)
+                case TokenType.MULT_MULT:
+                    power: ir.Function = self.module.declare_intrinsic("llvm.pow", [left.type])
+                    return builder.call(power, [left, right])
+            self.error(f"Operator {operator.lexeme} is not defined for {finn_type}", operator)
+
+        match token_type:
+            case TokenType.PLUS:
+                return builder.add(left, right)
+            case TokenType.MINUS:
+                return builder.sub(left, right)
+            case TokenType.MULT:
+                return builder.mul(left, right)
+            case TokenType.DIV:
+                return builder.sdiv(left, right) if finn_type.signed else builder.udiv(left, right)
+            case TokenType.MULT_MULT:
+                return builder.call(self.integer_power(finn_type), [left, right])
+            case TokenType.SHL | TokenType.SHR:
+                # the amount is masked to the width, so an oversized shift is
+                # defined instead of poison
+                amount: ir.Value = builder.and_(right, ir.Constant(right.type, finn_type.bits - 1))
+                if token_type == TokenType.SHL:
+                    return builder.shl(left, amount)
+                return builder.ashr(left, amount) if finn_type.signed else builder.lshr(left, amount)
+        self.error(f"Operator {operator.lexeme} is not defined for {finn_type}", operator)
+
+    def compare(self, operator: Token, left: ir.Value, right: ir.Value, finn_type: FinnType) -> ir.Value:
+        comparison: str = COMPARISONS[operator.token_type]
+        if finn_type.is_bool and comparison not in ("==", "!="):
+            self.error(f"Operator {operator.lexeme} is not defined for bool", operator)
+        if finn_type.is_float:
+            return self.builder.fcmp_ordered(comparison, left, right)
+        if finn_type.signed:
+            return self.builder.icmp_signed(comparison, left, right)
+        return self.builder.icmp_unsigned(comparison, left, right)
+
+    def negate(self, operator: Token, value: ir.Value, finn_type: FinnType) -> ir.Value:
+        if finn_type.is_bool:
+            self.error("Operator - is not defined for bool", operator)
+        return self.builder.fneg(value) if finn_type.is_float else self.builder.neg(value)
+
+    def step(self, operator: Token, variable: Variable) -> tuple[ir.Value, FinnType]:
+        # x++ and x-- store the new value and evaluate to the old one
+        finn_type: FinnType = variable.type
+        if finn_type.is_bool:
+            self.error(f"Operator {operator.lexeme} is not defined for bool", operator)
+
+        old: ir.Value = self.builder.load(variable.pointer)
+        one: ir.Constant = ir.Constant(old.type, 1.0 if finn_type.is_float else 1)
+        if finn_type.is_float:
+            new: ir.Value = self.builder.fadd(old, one) if operator.token_type == TokenType.PLUS_PLUS else self.builder.fsub(old, one)
+        else:
+            new = self.builder.add(old, one) if operator.token_type == TokenType.PLUS_PLUS else self.builder.sub(old, one)
+        self.builder.store(new, variable.pointer)
+        return (old, finn_type)
+
+    def integer_power(self, finn_type: FinnType) -> ir.Function:
+        # exponentiation by squaring, one helper per integer type. the
+        # exponent is read as unsigned bits, so everything wraps the way the
+        # other integer ops do.
+        name: str = f"finn.pow.{finn_type}"
+        if name in self.module.globals:
+            return self.module.globals[name]
+
+        lltype: ir.IntType = self.lltype(finn_type)
+        function: ir.Function = ir.Function(self.module, ir.FunctionType(lltype, [lltype, lltype]), name = name)
+        function.linkage = "internal"
+        base, exponent = function.args
+
+        entry: ir.Block = function.append_basic_block("entry")
+        loop: ir.Block = function.append_basic_block("loop")
+        body: ir.Block = function.append_basic_block("body")
+        done: ir.Block = function.append_basic_block("done")
+
+        builder: ir.IRBuilder = ir.IRBuilder(entry)
+        one: ir.Constant = ir.Constant(lltype, 1)
+        zero: ir.Constant = ir.Constant(lltype, 0)
+        builder.branch(loop)
+
+        builder.position_at_end(loop)
+        result: ir.PhiInstr = builder.phi(lltype)
+        square: ir.PhiInstr = builder.phi(lltype)
+        remaining: ir.PhiInstr = builder.phi(lltype)
+        builder.cbranch(builder.icmp_unsigned("!=", remaining, zero), body, done)
+
+        builder.position_at_end(body)
+        odd: ir.Value = builder.trunc(builder.and_(remaining, one), ir.IntType(1))
+        next_result: ir.Value = builder.select(odd, builder.mul(result, square), result)
+        next_square: ir.Value = builder.mul(square, square)
+        next_remaining: ir.Value = builder.lshr(remaining, one)
+        builder.branch(loop)
+
+        result.add_incoming(one, entry)
+        result.add_incoming(next_result, body)
+        square.add_incoming(base, entry)
+        square.add_incoming(next_square, body)
+        remaining.add_incoming(exponent, entry)
+        remaining.add_incoming(next_remaining, body)
+
+        builder.position_at_end(done)
+        builder.ret(result)
+        return function
+    # endregion
+
+    def generate(self, statements: list[Stmt]) -> ir.Module:
+        # top level statements become the body of the entry function, and the
+        # value of the last top level expression statement is left in the
+        # result global for whoever runs the module
+        self.function = ir.Function(self.module, ir.FunctionType(ir.VoidType(), []), name = ENTRY)
+        self.allocator = ir.IRBuilder(self.function.append_basic_block("entry"))
+        body: ir.Block = self.function.append_basic_block("body")
+        self.builder = ir.IRBuilder(body)
+        self.scopes = [{}]
+
+        result: tuple[ir.Value, FinnType] | None = None
+        for statement in statements:
+            value: tuple[ir.Value, FinnType] | None = statement.codegen(self)
+            if isinstance(statement, Stmt.Expression):
+                result = value
+
+        if result is not None:
+            variable: ir.GlobalVariable = ir.GlobalVariable(self.module, result[0].type, name = RESULT)
+            variable.initializer = ir.Constant(result[0].type, None)
+            self.result_type = result[1]
+            self.builder.store(result[0], variable)
+        self.builder.ret_void()
+        self.allocator.branch(body)
+        return self.module
+
+
+COMPARISONS: dict[TokenType, str] = {
+    TokenType.EQUAL_EQUAL : "==",
+    TokenType.NOT_EQUAL   : "!=",
+    TokenType.LT          : "<",
+    TokenType.LT_EQUAL    : "<=",
+    TokenType.GT          : ">",
+    TokenType.GT_EQUAL    : ">="
+}
+
+def generate(statements: list[Stmt], name: str) -> ir.Module:
+    return CodeGenerator(name).generate(statements)
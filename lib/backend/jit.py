@@ -0,0 +1,130 @@
+# type: ignore
+import ctypes
+import ctypes.util
+import struct
+import sys
+from collections.abc import Callable
+from functools import cache
+
+import llvmlite.binding as llvm
+from llvmlite import ir
+
+from ..frontend.source import Source
+from ..frontend.expr import Stmt
+from ..frontend.types import FinnType
+from ..frontend.cache import DiskCache
+from .codegen import CodeGenerator, ENTRY, RESULT
+from .passes import Optimizer
+from .objcache import ObjectCache
+
+@cache
+def load_runtime() -> None:
+    # 128 bit division lowers to calls into the compiler runtime (__divti3
+    # and friends), which jitted code can only resolve once libgcc is loaded.
+    # platforms without it link those helpers into the process already.
+    library: str | None = ctypes.util.find_library("gcc_s")
+    if library is not None:
+        llvm.load_library_permanently(library)
+
+def ctype(finn_type: FinnType) -> type:
+    if finn_type.is_bool:
+        return ctypes.c_bool
+    if finn_type.is_float:
+        return ctypes.c_float if finn_type.bits == 32 else ctypes.c_double
+    if finn_type.bits > 64:
+        raise ValueError(f"ctypes cannot pass {finn_type} values")
+    return getattr(ctypes, f"c_{'' if finn_type.signed else 'u'}int{finn_type.bits}")
+
+def decode(data: bytes, finn_type: FinnType) -> int | float | bool:
+    # globals are read as raw bytes, since ctypes has no 128 bit integers
+    if finn_type.is_bool:
+        return bool(data[0] & 1)
+    if finn_type.is_float:
+        return struct.unpack("f" if finn_type.bits == 32 else "d", data)[0]
+    return int.from_bytes(data, sys.byteorder, signed = finn_type.signed)
+
+
+class JitModule:
+
+    def __init__(self, engine: "JitEngine", name: str, prefix: str, result_type: FinnType | None) -> None:
+        self.engine: JitEngine = engine
+        self.name: str = name
+        self.prefix: str = prefix
+        self.result_type: FinnType | None = result_type
+
+    def symbol(self, name: str) -> str:
+        return self.prefix + name
+
+    def function(self, name: str, restype: FinnType | None = None, *argtypes: FinnType) -> Callable:
+        address: int = self.engine.engine.get_function_address(self.symbol(name))
+        if not address:
+            raise KeyError(f"{self.name} has no function \"{name}\"")
+        prototype = ctypes.CFUNCTYPE(ctype(restype) if restype else None, *(ctype(argtype) for argtype in argtypes))
+        return prototype(address)
+
+    def result(self) -> int | float | bool | None:
+        if self.result_type is None:
+            return None
+        address: int = self.engine.engine.get_global_value_address(self.symbol(RESULT))
+        return decode(ctypes.string_at(address, max(self.result_type.bits // 8, 1)), self.result_type)
+
+    def run(self) -> int | float | bool | None:
+        self.function(ENTRY)()
+        return self.result()
+
+
+class JitEngine:
+
+    # one MCJIT engine that any number of modules are added to, so a host
+    # process pays for target setup once. every module defines main and
+    # result, so their exported symbols are prefixed per module. with a disk
+    # cache, machine code compiled by earlier processes is loaded instead of
+    # being generated again.
+    def __init__(self, optimizer: Optimizer | None = None, disk: DiskCache | None = None) -> None:
+        load_runtime()
+        self.optimizer: Optimizer = optimizer or Optimizer()
+        self.target_machine: llvm.TargetMachine = self.optimizer.target_machine
+        self.engine: llvm.ExecutionEngine = llvm.create_mcjit_compiler(llvm.parse_assembly(""), self.target_machine)
+        self.modules: list[JitModule] = []
+
+        self.object_cache: ObjectCache | None = None
+        if disk is not None:
+            self.object_cache = ObjectCache(disk, self.optimizer)
+            self.object_cache.attach(self.engine)
+
+    def load(self, module: ir.Module, result_type: FinnType | None = None, source: Source | None = None) -> JitModule:
+        return self.add(self.prepare(module, result_type, source), module.name, result_type)
+
+    def prepare(self, module: ir.Module, result_type: FinnType | None = None, source: Source | None = None) -> llvm.ModuleRef:
+        parsed: llvm.ModuleRef = self.optimizer.prepare(module)
+        if source is not None and self.object_cache is not None:
+            self.object_cache.store_module(source, parsed, result_type)
+        return parsed
+
+    def cached(self, source: Source) -> JitModule | None:
+        entry: tuple[llvm.ModuleRef, FinnType | None] | None = self.object_cache.load_module(source) if self.object_cache else None
+        if entry is None:
+            return None
+        return self.add(entry[0], source.filename, entry[1])
+
+    def add(self, parsed: llvm.ModuleRef, name: str, result_type: FinnType | None) -> JitModule:
+        prefix: str = f"finn{len(self.modules)}."
+        for value in (*parsed.functions, *parsed.global_variables):
+            if not value.is_declaration and value.linkage != llvm.Linkage.internal:
+                value.name = prefix + value.name
+
+        self.engine.add_module(parsed)
+        self.engine.finalize_object()
+
+        loaded: JitModule = JitModule(self, name, prefix, result_type)
+        self.modules.append(loaded)
+        return loaded
+
+    def compile(self, statements: list[Stmt], name: str, source: Source | None = None) -> JitModule:
+        gen: CodeGenerator = CodeGenerator(name)
+        return self.load(gen.generate(statements), gen.result_type, source)
+
+
+@cache
+def default_engine(level: str = "-O2", time_passes: bool = False, cache_dir: str | None = None) -> JitEngine:
+    return JitEngine(Optimizer(level, time_passes), DiskCache(cache_dir) if cache_dir else None)
@@ -0,0 +1,91 @@
+# type: ignore
+import hashlib
+import os
+from functools import cache
+
+import llvmlite.binding as llvm
+
+from ..frontend.source import Source
+from ..frontend.cache import DiskCache, compiler_version
+from ..frontend.types import FinnType, lookup_type
+from .passes import Optimizer
+
+# backend modules whose contents decide the ir a source compiles to
+BACKEND_MODULES: tuple[str, ...] = ("../frontend/types.py", "../frontend/symbols.py", "../frontend/resolver.py", "../frontend/fold.py", "codegen.py", "passes.py", "jit.py", "objcache.py")
+
+@cache
+def backend_version() -> str:
+    digest = hashlib.sha256(compiler_version().encode())
+    digest.update(llvm.__name__.encode() + str(llvm.llvm_version_info).encode())
+    directory: str = os.path.dirname(os.path.abspath(__file__))
+    for name in BACKEND_MODULES:
+        with open(os.path.join(directory, name), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+class ObjectCache:
+
+    # machine code for jitted modules, stored in the same size bounded, least
+    # recently used directory the frontend cache uses. the key is everything
+    # that decides the object's bytes: the optimized ir, which already has
+    # the engine's symbol names, the target triple and the host cpu with its
+    # features, so a cache shared between machines never hands back code the
+    # cpu cannot run.
+    #
+    # printing and optimizing ir cost more than emitting machine code, so the
+    # optimized ir is kept too, keyed by the source text, the compiler and the
+    # pipeline. a warm start then goes from source straight to a parsed
+    # module without running the frontend, codegen or the optimizer.
+    def __init__(self, disk: DiskCache, optimizer: Optimizer) -> None:
+        self.disk: DiskCache = disk
+        self.optimizer: Optimizer = optimizer
+        self.target: str = f"{optimizer.target_machine.triple}\n{optimizer.cpu}\n{optimizer.features}\n"
+
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def key(self, module: llvm.ModuleRef) -> str:
+        digest = hashlib.sha256(b"object\n")
+        digest.update(self.target.encode())
+        digest.update(str(module).encode())
+        return digest.hexdigest()
+
+    def module_key(self, source: Source) -> str:
+        digest = hashlib.sha256(b"module\n")
+        digest.update(f"{backend_version()}\n{self.target}{self.optimizer.level}\n".encode())
+        digest.update(source.data())
+        return digest.hexdigest()
+
+    def load_module(self, source: Source) -> tuple[llvm.ModuleRef, FinnType | None] | None:
+        # pass timing has to run the pipeline to have anything to report
+        if self.optimizer.time_passes:
+            return None
+        data: bytes | None = self.disk.get(self.module_key(source))
+        if data is None:
+            return None
+        result, _, text = data.decode().partition("\n")
+        try:
+            parsed: llvm.ModuleRef = llvm.parse_assembly(text)
+        except RuntimeError:
+            self.disk.remove(self.module_key(source))
+            return None
+        parsed.name = source.filename
+        return (parsed, lookup_type(result) if result else None)
+
+    def store_module(self, source: Source, module: llvm.ModuleRef, result_type: FinnType | None) -> None:
+        self.disk.put(self.module_key(source), f"{result_type or ''}\n{module}".encode())
+
+    def attach(self, engine: llvm.ExecutionEngine) -> None:
+        engine.set_object_cache(self.compiled, self.lookup)
+
+    def lookup(self, module: llvm.ModuleRef) -> bytes | None:
+        data: bytes | None = self.disk.get(self.key(module))
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+
+    def compiled(self, module: llvm.ModuleRef, data: bytes) -> None:
+        self.disk.put(self.key(module), data)
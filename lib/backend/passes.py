@@ -0,0 +1,84 @@
+# type: ignore
+from functools import cache
+
+import llvmlite.binding as llvm
+from llvmlite import ir
+
+# speed level and whether to optimize for size, per command line flag. the
+# pass builder has no size level of its own, so -Os is the speed 2 pipeline
+# with every function marked optsize and the code growing transforms off.
+LEVELS: dict[str, tuple[int, bool]] = {
+    "-O0" : (0, False),
+    "-O1" : (1, False),
+    "-O2" : (2, False),
+    "-O3" : (3, False),
+    "-Os" : (2, True)
+}
+
+# the inliner thresholds clang uses for the same levels
+INLINE_THRESHOLDS: dict[str, int] = {
+    "-O0" : 0,
+    "-O1" : 225,
+    "-O2" : 225,
+    "-O3" : 250,
+    "-Os" : 75
+}
+
+@cache
+def initialize() -> None:
+    llvm.initialize_native_target()
+    llvm.initialize_native_asmprinter()
+
+
+class Optimizer:
+
+    # lowers codegen output to a verified llvm module for the host and runs
+    # the standard per-module pipeline over it: inlining, sroa (which is
+    # mem2reg for the alloca-per-local ir codegen emits), gvn, instcombine,
+    # loop and slp vectorization from -O2 up.
+    def __init__(self, level: str = "-O2", time_passes: bool = False) -> None:
+        initialize()
+        speed, size = LEVELS[level]
+        self.level: str = level
+        self.size: bool = size
+        self.time_passes: bool = time_passes
+
+        # code is generated for the host cpu and its full feature set, which
+        # is what makes the vectorizers worth running
+        self.cpu: str = llvm.get_host_cpu_name()
+        self.features: str = llvm.get_host_cpu_features().flatten()
+        self.target_machine: llvm.TargetMachine = llvm.Target.from_default_triple().create_target_machine(self.cpu, self.features, opt = speed)
+
+        self.options: llvm.PipelineTuningOptions = llvm.PipelineTuningOptions(speed)
+        self.options.inlining_threshold = INLINE_THRESHOLDS[level]
+        self.options.loop_unrolling = speed >= 2 and not size
+        self.options.loop_interleaving = speed >= 2 and not size
+        self.options.loop_vectorization = speed >= 2 and not size
+        self.options.slp_vectorization = speed >= 2 and not size
+
+        # one llvm timing report per optimized module, when asked for
+        self.reports: list[tuple[str, str]] = []
+
+    def prepare(self, module: ir.Module) -> llvm.ModuleRef:
+        parsed: llvm.ModuleRef = llvm.parse_assembly(str(module))
+        parsed.name = module.name
+        parsed.triple = self.target_machine.triple
+        parsed.data_layout = str(self.target_machine.target_data)
+        parsed.verify()
+        self.optimize(parsed)
+        return parsed
+
+    def optimize(self, module: llvm.ModuleRef) -> None:
+        if self.size:
+            for function in module.functions:
+                if not function.is_declaration:
+                    function.add_function_attribute("optsize")
+
+        # timers can only be started once per pass builder, so every module
+        # gets a fresh one
+        builder: llvm.PassBuilder = llvm.create_pass_builder(self.target_machine, self.options)
+        if self.time_passes:
+            builder.start_pass_timing()
+        builder.getModulePassManager().run(module, builder)
+        if self.time_passes:
+            self.reports.append((module.name, builder.finish_pass_timing()))
@@ -0,0 +1,289 @@
+# type: ignore
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .frontend.token import TokenBuffer
+from .frontend.source import Source
+from .frontend.lexer import Lexer
+from .frontend.parser import Parser
+from .frontend.arena import AstArena
+from .frontend.cache import DiskCache, FrontendCache
+from .frontend.resolver import Resolver
+from .frontend.errors import Diagnostics
+
+MODES: frozenset[str] = frozenset(("tree", "ir", "run"))
+
+def default_socket() -> str:
+    directory: str = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, f"finn-{os.getuid()}.sock" if hasattr(os, "getuid") else "finn.sock")
+
+def request(path: str, message: dict) -> dict | None:
+    # the thin client. None means no daemon is listening, so the caller can
+    # compile in process instead.
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(path)
+            connection.sendall(json.dumps(message).encode() + b"\n")
+            with connection.makefile("rb") as reader:
+                line: bytes = reader.readline()
+    except (OSError, AttributeError):
+        return None
+    return json.loads(line) if line else None
+
+
+class ThreadOutput:
+
+    # stands in for sys.stdout while serving. each request writes into its
+    # own buffer, so pprint and error messages go back to the client that
+    # asked instead of interleaving on the daemon's terminal.
+    def __init__(self, stream) -> None:
+        self.stream = stream
+        self.local: threading.local = threading.local()
+
+    def capture(self) -> None:
+        self.local.parts = []
+
+    def release(self) -> str:
+        parts: list[str] = self.local.parts
+        self.local.parts = None
+        return "".join(parts)
+
+    def write(self, text: str) -> int:
+        parts: list[str] | None = getattr(self.local, "parts", None)
+        if parts is None:
+            return self.stream.write(text)
+        parts.append(text)
+        return len(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+
+class CachedFile:
+
+    # everything compiled from one version of a file. stamp is the mtime and
+    # size it was read at, digest the hash of its text.
+    def __init__(self, filename: str, text: str, stamp: tuple[int, int], digest: str) -> None:
+        self.source: Source = Source(text, filename)
+        self.stamp: tuple[int, int] = stamp
+        self.digest: str = digest
+
+        self.arena: AstArena | None = None
+        self.ir: dict[str | None, str] = {}
+        self.jit: dict[str, object] = {}
+
+
+class CompilerService:
+
+    # the compiler behind the daemon. files stay parsed, lowered and jitted
+    # between requests, and are only read again when their mtime or size
+    # moved, then only recompiled when the text's hash changed too. llvm's
+    # global context isn't thread safe, so the backend runs one request at
+    # a time while the frontend work of others goes on.
+    def __init__(self, cache_dir: str | None = None) -> None:
+        self.cache_dir: str | None = cache_dir
+        self.frontend_cache: FrontendCache | None = FrontendCache(DiskCache(cache_dir)) if cache_dir else None
+
+        self.files: dict[str, CachedFile] = {}
+        self.lock: threading.Lock = threading.Lock()
+        self.backend: threading.Lock = threading.Lock()
+
+    # region "Helper Functions"
+    def load(self, filename: str) -> CachedFile:
+        status = os.stat(filename)
+        stamp: tuple[int, int] = (status.st_mtime_ns, status.st_size)
+        with self.lock:
+            cached: CachedFile | None = self.files.get(filename)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+
+        with open(filename, "r") as file:
+            text: str = file.read()
+        digest: str = hashlib.sha256(text.encode()).hexdigest()
+        if cached is not None and cached.digest == digest:
+            cached.stamp = stamp
+            return cached
+
+        cached = CachedFile(filename, text, stamp, digest)
+        with self.lock:
+            self.files[filename] = cached
+        return cached
+
+    def arena(self, cached: CachedFile) -> AstArena:
+        if cached.arena is None:
+            arena: AstArena | None = self.frontend_cache.load(cached.source) if self.frontend_cache else None
+            if arena is None:
+                diagnostics: Diagnostics = Diagnostics()
+                arena = AstArena(TokenBuffer(cached.source))
+                for statement in Parser(Lexer(cached.source, diagnostics = diagnostics).iter_tokens(), diagnostics).iter_parse():
+                    arena.add(statement)
+                if diagnostics:
+                    diagnostics.render()
+                    exit(1)
+                if self.frontend_cache:
+                    self.frontend_cache.store(cached.source, arena)
+            cached.arena = arena
+        return cached.arena
+
+    def statements(self, cached: CachedFile, level: str | None) -> list:
+        # the same resolving and folding finn.py does, folding off at -O0
+        statements: list = self.arena(cached).to_ast()
+        diagnostics: Diagnostics = Diagnostics()
+        Resolver(diagnostics).resolve(statements)
+        if diagnostics:
+            diagnostics.render()
+            exit(1)
+        if level == "-O0":
+            return statements
+        from .frontend.fold import ConstantFolder
+
+        return ConstantFolder().fold(statements)
+    # endregion
+
+    # region "Main Functions"
+    def tree(self, cached: CachedFile) -> None:
+        self.arena(cached).pprint()
+
+    def ir(self, cached: CachedFile, level: str | None) -> None:
+        # ir is printed as codegen emits it unless a level is given
+        if level not in cached.ir:
+            from .backend.codegen import CodeGenerator
+            from .backend.passes import Optimizer
+
+            statements: list = self.statements(cached, level)
+            with self.backend:
+                module = CodeGenerator(cached.source.filename).generate(statements)
+                cached.ir[level] = str(Optimizer(level).prepare(module) if level else module)
+        print(cached.ir[level])
+
+    def run(self, cached: CachedFile, level: str | None) -> None:
+        from .backend.jit import default_engine
+
+        level = level or "-O2"
+        if level not in cached.jit:
+            with self.backend:
+                engine = default_engine(level, False, self.cache_dir)
+                loaded = engine.cached(cached.source)
+            if loaded is None:
+                from .backend.codegen import CodeGenerator
+
+                statements: list = self.statements(cached, level)
+                with self.backend:
+                    gen: CodeGenerator = CodeGenerator(cached.source.filename)
+                    module = gen.generate(statements)
+                    loaded = engine.add(engine.prepare(module, gen.result_type, cached.source), cached.source.filename, gen.result_type)
+            cached.jit[level] = loaded
+        with self.backend:
+            result = cached.jit[level].run()
+        if result is not None:
+            print(result)
+
+    def handle(self, message: dict, output: ThreadOutput) -> dict:
+        mode: str = message.get("mode", "tree")
+        if mode not in MODES:
+            return { "status": 1, "output": f"Invalid command: \"{mode}\"\n" }
+
+        output.capture()
+        status: int = 0
+        try:
+            cached: CachedFile = self.load(message["path"])
+            match mode:
+                case "tree":
+                    self.tree(cached)
+                case "ir":
+                    self.ir(cached, message.get("level"))
+                case "run":
+                    self.run(cached, message.get("level"))
+        except SystemExit as stopped:
+            # compile errors print their message and exit, which in here only
+            # ends this request
+            status = stopped.code if isinstance(stopped.code, int) else 1
+        except OSError as error:
+            print(f"[ ERR ] {message['path']} : {error.strerror}")
+            status = 1
+        except RecursionError:
+            # folding and codegen recurse into expressions, as in finn.py
+            print(f"[ ERR ] {message['path']} : Expression nested too deeply")
+            status = 1
+        finally:
+            text: str = output.release()
+        return { "status": status, "output": text }
+    # endregion
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        line: bytes = self.rfile.readline()
+        if not line:
+            return
+        message: dict = json.loads(line)
+        response: dict = { "status": 0, "output": "" }
+        match message.get("mode"):
+            case "ping":
+                pass
+            case "stop":
+                threading.Thread(target = self.server.shutdown).start()
+            case _:
+                response = self.server.service.handle(message, self.server.output)
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+
+    # connections are handed to a fixed pool of threads instead of one new
+    # thread each, so a burst of build steps can't pile up without bound
+    def __init__(self, path: str, service: CompilerService, workers: int | None = None) -> None:
+        super().__init__(path, RequestHandler)
+        self.service: CompilerService = service
+        self.pool: ThreadPoolExecutor = ThreadPoolExecutor(max_workers = workers)
+        self.output: ThreadOutput = ThreadOutput(sys.stdout)
+
+    def process_request(self, request, client_address) -> None:
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown()
+
+
+def serve(path: str, workers: int | None = None, cache_dir: str | None = None) -> None:
+    if not hasattr(socket, "AF_UNIX"):
+        print("[ ERR ] Daemon : Unix sockets are not supported on this platform")
+        exit(1)
+    if os.path.exists(path):
+        # a socket nobody answers on is left over from a daemon that died
+        if request(path, { "mode": "ping" }) is not None:
+            print(f"[ ERR ] Daemon : Already serving on {path}")
+            exit(1)
+        os.remove(path)
+
+    server: DaemonServer = DaemonServer(path, CompilerService(cache_dir), workers)
+    sys.stdout = server.output
+    print(f"[ OK ] Serving on {path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.stdout = server.output.stream
+        os.remove(path)
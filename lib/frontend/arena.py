@@ -0,0 +1,296 @@
+# type: ignore
+from array import array
+from collections.abc import Callable, Iterator
+
+from .token import Token, TokenBuffer
+from .source import Source
+from .expr import Expr, Stmt
+
+BINARY, PREFIX, SUFFIX, LITERAL, GROUPING, VARIABLE, UNWRAP, EXPRESSION, IF, ASSIGN, REASSIGN, IMPORT, ERROR = range(13)
+
+KINDS: dict[type, int] = {
+    Expr.Binary     : BINARY,
+    Expr.Prefix     : PREFIX,
+    Expr.Suffix     : SUFFIX,
+    Expr.Literal    : LITERAL,
+    Expr.Grouping   : GROUPING,
+    Expr.Variable   : VARIABLE,
+    Expr.Unwrap     : UNWRAP,
+    Stmt.Expression : EXPRESSION,
+    Stmt.If         : IF,
+    Stmt.Assign     : ASSIGN,
+    Stmt.Reassign   : REASSIGN,
+    Stmt.Import     : IMPORT,
+    Stmt.Error      : ERROR
+}
+
+# children in the order pprint visits them
+CHILDREN: dict[int, Callable[[object], tuple]] = {
+    BINARY     : lambda node: (node.left, node.right),
+    PREFIX     : lambda node: (node.right,),
+    SUFFIX     : lambda node: (node.left,),
+    LITERAL    : lambda node: (),
+    GROUPING   : lambda node: (node.expression,),
+    VARIABLE   : lambda node: (),
+    UNWRAP     : lambda node: (node.name,),
+    EXPRESSION : lambda node: (node.expression,),
+    IF         : lambda node: (node.conditional, node.then_branch) if node.else_branch is None else (node.conditional, node.then_branch, node.else_branch),
+    ASSIGN     : lambda node: (*node.types, node.value),
+    REASSIGN   : lambda node: (node.value,),
+    IMPORT     : lambda node: tuple(Expr.Variable(token) for token in (*node.path, *node.names)),
+    ERROR      : lambda node: ()
+}
+
+# the token each kind keeps, if any
+TOKENS: dict[int, Callable[[object], Token]] = {
+    BINARY   : lambda node: node.operator,
+    PREFIX   : lambda node: node.operator,
+    SUFFIX   : lambda node: node.operator,
+    VARIABLE : lambda node: node.name,
+    ASSIGN   : lambda node: node.name,
+    REASSIGN : lambda node: node.name,
+    ERROR    : lambda node: node.token
+}
+
+INFER, CONST = 1, 2
+
+class AstArena:
+
+    # a whole tree as flat columns. nodes are integer indices, stored in post
+    # order so every child comes before its parent, and a node's children are
+    # a contiguous run of the children column. data is a token index for
+    # kinds that keep a token and a constant index for literals. an import
+    # keeps its path and names as variable children, with data holding how
+    # many of them are path segments. an error node's constant is its message
+    # with the index of its token.
+    def __init__(self, tokens: TokenBuffer) -> None:
+        self.tokens: TokenBuffer = tokens
+        self.constants: list[object] = []
+        self.constant_index: dict[tuple[type, object], int] = {}
+
+        self.kinds:    array = array("B")
+        self.flags:    array = array("B")
+        self.data:     array = array("i")
+        self.first:    array = array("I")
+        self.count:    array = array("I")
+        self.children: array = array("I")
+
+        self.roots:    array = array("I")
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @classmethod
+    def from_ast(cls, statements: list[Stmt], tokens: TokenBuffer) -> "AstArena":
+        arena: AstArena = cls(tokens)
+        for statement in statements:
+            arena.add(statement)
+        return arena
+
+    # region "Building"
+    def add_token(self, token: Token) -> int:
+        self.tokens.append(token.token_type, token.token_kind, token.start, token.end)
+        return len(self.tokens) - 1
+
+    def add_constant(self, value: object) -> int:
+        key: tuple[type, object] = (type(value), value)
+        index: int | None = self.constant_index.get(key)
+        if index is None:
+            index = len(self.constants)
+            self.constants.append(value)
+            self.constant_index[key] = index
+        return index
+
+    def add(self, statement: Stmt) -> int:
+        # post order walk with an explicit stack, since expressions can nest
+        # deeper than the recursion limit
+        stack: list[tuple[object, bool]] = [(statement, False)]
+        done: list[int] = []
+
+        while stack:
+            node, expanded = stack.pop()
+            kind: int = KINDS[type(node)]
+            children: tuple = CHILDREN[kind](node)
+
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children))
+                continue
+
+            flags: int = 0
+            if kind == LITERAL:
+                data: int = self.add_constant(node.value)
+            elif kind == IMPORT:
+                data = len(node.path)
+            elif kind == ERROR:
+                data = self.add_constant((node.message, self.add_token(node.token)))
+            elif kind in TOKENS:
+                data = self.add_token(TOKENS[kind](node))
+            else:
+                data = -1
+
+            if kind == ASSIGN:
+                flags = (INFER if node.infer else 0) | (CONST if node.const else 0)
+            elif kind == IF and node.else_branch is not None:
+                flags = 1
+
+            self.first.append(len(self.children))
+            self.count.append(len(children))
+            if children:
+                self.children.extend(done[-len(children):])
+                del done[-len(children):]
+
+            self.kinds.append(kind)
+            self.flags.append(flags)
+            self.data.append(data)
+            done.append(len(self.kinds) - 1)
+
+        self.roots.append(done[0])
+        return done[0]
+    # endregion
+
+    # region "Access"
+    def child_nodes(self, node: int) -> array:
+        first: int = self.first[node]
+        return self.children[first:first + self.count[node]]
+
+    def token(self, node: int) -> Token:
+        return self.tokens[self.data[node]]
+
+    def value(self, node: int) -> object:
+        return self.constants[self.data[node]]
+
+    def import_path(self, node: int) -> tuple[list[str], list[str]]:
+        segments: list[str] = [self.token(child).lexeme for child in self.child_nodes(node)]
+        return (segments[:self.data[node]], segments[self.data[node]:])
+
+    def nodes(self, kind: int) -> Iterator[int]:
+        kinds: array = self.kinds
+        for node in range(len(kinds)):
+            if kinds[node] == kind:
+                yield node
+    # endregion
+
+    # region "Conversion"
+    def to_ast(self) -> list[Stmt]:
+        # post order storage means every child is built before its parent
+        built: list[object] = [None] * len(self.kinds)
+
+        for node in range(len(self.kinds)):
+            kind: int = self.kinds[node]
+            children: list[object] = [built[child] for child in self.child_nodes(node)]
+
+            if kind == BINARY:
+                built[node] = Expr.Binary(children[0], self.token(node), children[1])
+            elif kind == PREFIX:
+                built[node] = Expr.Prefix(children[0], self.token(node))
+            elif kind == SUFFIX:
+                built[node] = Expr.Suffix(children[0], self.token(node))
+            elif kind == LITERAL:
+                built[node] = Expr.Literal(self.value(node))
+            elif kind == GROUPING:
+                built[node] = Expr.Grouping(children[0])
+            elif kind == VARIABLE:
+                built[node] = Expr.Variable(self.token(node))
+            elif kind == UNWRAP:
+                built[node] = Expr.Unwrap(children[0])
+            elif kind == EXPRESSION:
+                built[node] = Stmt.Expression(children[0])
+            elif kind == IF:
+                built[node] = Stmt.If(children[0], children[1], children[2] if self.flags[node] else None)
+            elif kind == ASSIGN:
+                flags: int = self.flags[node]
+                built[node] = Stmt.Assign(self.token(node), children[:-1], children[-1], bool(flags & INFER), bool(flags & CONST))
+            elif kind == REASSIGN:
+                built[node] = Stmt.Reassign(self.token(node), children[0])
+            elif kind == IMPORT:
+                segments: list[Token] = [child.name for child in children]
+                built[node] = Stmt.Import(segments[:self.data[node]], segments[self.data[node]:])
+            elif kind == ERROR:
+                message, token = self.value(node)
+                built[node] = Stmt.Error(self.tokens[token], message)
+
+        return [built[root] for root in self.roots]
+
+    def lines(self, node: int, indent: int = 0) -> Iterator[str]:
+        # the same lines the node classes' pprint produces, without recursion
+        stack: list[tuple[int, int] | str] = [(node, indent)]
+
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+                continue
+
+            node, indent = item
+            kind: int = self.kinds[node]
+            pad: str = " " * indent
+            inner: int = indent + 4
+            children: list[tuple[int, int]] = [(child, inner) for child in self.child_nodes(node)]
+
+            if kind == BINARY:
+                yield f"{pad}Expr.Binary("
+                stack.extend((f"{pad})", children[1], f"{' ' * inner}Operator({self.token(node).lexeme})", children[0]))
+            elif kind == PREFIX:
+                yield f"{pad}Expr.Prefix("
+                stack.extend((f"{pad})", f"{' ' * inner}Operator({self.token(node).lexeme})", children[0]))
+            elif kind == SUFFIX:
+                yield f"{pad}Expr.Suffix("
+                stack.extend((f"{pad})", f"{' ' * inner}Operator({self.token(node).lexeme})", children[0]))
+            elif kind == LITERAL:
+                yield f"{pad}Expr.Literal({self.value(node)})"
+            elif kind == GROUPING:
+                yield f"{pad}Expr.Grouping("
+                stack.extend((f"{pad})", children[0]))
+            elif kind == VARIABLE:
+                yield f"{pad}Expr.Variable({self.token(node).lexeme})"
+            elif kind == UNWRAP:
+                yield f"{pad}Expr.Unwrap("
+                stack.extend((f"{pad})", children[0]))
+            elif kind == EXPRESSION:
+                yield f"{pad}Stmt.Expression("
+                stack.extend((f"{pad})", children[0]))
+            elif kind == IF:
+                yield f"{pad}Stmt.If("
+                stack.append(f"{pad})")
+                stack.extend(reversed(children))
+            elif kind == ASSIGN:
+                yield f"{pad}Stmt.Assign("
+                yield f"{' ' * inner}Expr.Variable({self.token(node).lexeme})"
+                stack.append(f"{pad})")
+                stack.extend(reversed(children))
+            elif kind == REASSIGN:
+                yield f"{pad}Stmt.Reassign("
+                yield f"{' ' * inner}Expr.Variable({self.token(node).lexeme})"
+                stack.extend((f"{pad})", children[0]))
+            elif kind == IMPORT:
+                path, names = self.import_path(node)
+                listed: str = f"::{{{', '.join(names)}}}" if names else ""
+                yield f"{pad}Stmt.Import({'::'.join(path)}{listed})"
+            elif kind == ERROR:
+                yield f"{pad}Stmt.Error({self.value(node)[0]})"
+
+    def dump(self) -> tuple:
+        # plain bytes, strings and constants only, so the result can go
+        # through marshal or pickle cheaply
+        columns: tuple = (self.kinds, self.flags, self.data, self.first, self.count, self.children, self.roots)
+        tokens: tuple = (self.tokens.types, self.tokens.kinds, self.tokens.starts, self.tokens.ends)
+        return (tuple(column.tobytes() for column in columns), tuple(column.tobytes() for column in tokens), tuple(self.constants))
+
+    @classmethod
+    def load(cls, dumped: tuple, source: Source) -> "AstArena":
+        columns, tokens, constants = dumped
+        arena: AstArena = cls(TokenBuffer(source))
+        for column, data in zip((arena.kinds, arena.flags, arena.data, arena.first, arena.count, arena.children, arena.roots), columns):
+            column.frombytes(data)
+        for column, data in zip((arena.tokens.types, arena.tokens.kinds, arena.tokens.starts, arena.tokens.ends), tokens):
+            column.frombytes(data)
+        arena.constants = list(constants)
+        arena.constant_index = { (type(value), value): index for index, value in enumerate(arena.constants) }
+        return arena
+
+    def pprint(self) -> None:
+        for root in self.roots:
+            for line in self.lines(root):
+                print(line)
+    # endregion
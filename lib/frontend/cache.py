@@ -0,0 +1,137 @@
+import hashlib
+import marshal
+import os
+import time
+from functools import cache
+
+from .source import Source
+from .arena import AstArena
+
+# frontend modules whose contents decide the shape of a cached AST, so any
+# change to them is a new compiler version and misses every old entry
+FRONTEND_MODULES: tuple[str, ...] = ("token.py", "symbols.py", "source.py", "lexer.py", "parser.py", "expr.py", "arena.py", "resolver.py", "cache.py")
+
+DEFAULT_MAX_BYTES: int = 512 * 1024 * 1024
+DEFAULT_MAX_AGE: float = 30 * 24 * 60 * 60
+
+@cache
+def compiler_version() -> str:
+    digest = hashlib.sha256()
+    directory: str = os.path.dirname(os.path.abspath(__file__))
+    for name in FRONTEND_MODULES:
+        with open(os.path.join(directory, name), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+def default_directory() -> str:
+    if "FINN_CACHE_DIR" in os.environ:
+        return os.environ["FINN_CACHE_DIR"]
+    base: str = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "finn")
+
+
+class DiskCache:
+
+    # a directory of immutable blobs keyed by hex digest. reads bump the
+    # entry's mtime, so eviction by oldest mtime is least recently used.
+    # the directory is only walked on the first write and then whenever the
+    # running total goes over budget, so a cold build doesn't stat every
+    # entry once per entry it writes. writes from other processes aren't in
+    # the total until the next walk, so the budget can be overshot by
+    # whatever they wrote in between.
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, max_age: float | None = DEFAULT_MAX_AGE) -> None:
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self.max_age: float | None = max_age
+        self.total: int | None = None
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, key: str) -> bytes | None:
+        path: str = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                data: bytes = file.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        path: str = self.path(key)
+        temporary: str = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+            with open(temporary, "wb") as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except OSError:
+            return
+        if self.total is None:
+            self.evict()
+            return
+        self.total += len(data)
+        if self.total > self.max_bytes:
+            self.evict()
+
+    def remove(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        entries: list[tuple[float, int, str]] = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path: str = os.path.join(root, name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+        return entries
+
+    def evict(self) -> None:
+        entries: list[tuple[float, int, str]] = sorted(self.entries())
+        total: int = sum(size for _, size, _ in entries)
+        oldest: float = time.time() - self.max_age if self.max_age is not None else float("-inf")
+
+        for mtime, size, path in entries:
+            if mtime >= oldest and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        self.total = total
+
+
+class FrontendCache:
+
+    def __init__(self, disk: DiskCache) -> None:
+        self.disk: DiskCache = disk
+
+    def key(self, source: Source) -> str:
+        # offsets into mapped bytes and into a str differ once a file has
+        # anything but ascii, so the two never share entries
+        digest = hashlib.sha256(compiler_version().encode())
+        digest.update(b"bytes\n" if source.encoded else b"text\n")
+        digest.update(source.data())
+        return digest.hexdigest()
+
+    def load(self, source: Source) -> AstArena | None:
+        key: str = self.key(source)
+        data: bytes | None = self.disk.get(key)
+        if data is None:
+            return None
+        try:
+            return AstArena.load(marshal.loads(data), source)
+        except (EOFError, ValueError, TypeError):
+            self.disk.remove(key)
+            return None
+
+    def store(self, source: Source, arena: AstArena) -> None:
+        self.disk.put(self.key(source), marshal.dumps(arena.dump()))
@@ -1,30 +1,36 @@
+from functools import cache
+
 from .token import Token
 
-from rich.console import Console
+# the most errors one render prints, the rest are only counted
+MAX_RENDERED: int = 100
+
+@cache
+def console():
+    # one console shared by every message. rich is only worth importing once
+    # there is something to render.
+    from rich.console import Console
+
+    return Console()
+
 
 class ErrorPrinter:
 
-    def __init__(self, lines: list[str], message: str, token: Token) -> None:
-        self.lines = lines
+    def __init__(self, message: str, token: Token) -> None:
         self.message = message
         self.token = token
 
         self.padding: int = 2
-        self.console = Console()
 
         self.output: str = ""
 
 
     def construct_message(self) -> None:
-        buffer_lines: list[str] = []
-        count: int = 0
-        for i in range(self.token.position[0] - 1, len(self.lines)):
-            try:
-                if count <= 3:
-                    buffer_lines.append(self.lines[i])
-                    count += 1
-            except:
-                pass
+        line: int = self.token.position[0]
+        # an error on the eof token after a trailing newline is on the line
+        # the newline would start, so that one is always shown
+        last_line: int = max(min(line + 3, self.token.source.line_count()), line)
+        buffer_lines: list[str] = [self.token.source.line(number) for number in range(line, last_line + 1)]
         line_number_padding: int = 4 + len(str(self.token.position[0]))
         self.output += f"[bold]{self.token.filename}[/]:[bold blue]{self.token.position[0]}[/][white]:[/][bold blue]{self.token.position[1][0]}[/]: \n{' ' * line_number_padding}│\n"
         self.output += f"{' ' * self.padding} [bold blue]{self.token.position[0]}[/] │ {buffer_lines[0]}\n"
@@ -36,4 +42,39 @@ class ErrorPrinter:
 
     def print_error(self) -> None:
         self.construct_message()
-        self.console.print(self.output)
\ No newline at end of file
+        console().print(self.output)
+
+
+class Diagnostics:
+
+    # errors collected over a whole run and rendered together in a single
+    # write, so one pass reports every mistake in a file. snippets come from
+    # the source's line index, so each one costs the same wherever it is.
+    # fail fast diagnostics print the first error and exit, the way the
+    # compiler always has.
+    def __init__(self, fail_fast: bool = False, limit: int = MAX_RENDERED) -> None:
+        self.fail_fast: bool = fail_fast
+        self.limit: int = limit
+        self.errors: list[ErrorPrinter] = []
+
+    def __len__(self) -> int:
+        return len(self.errors)
+
+    def error(self, message: str, token: Token) -> None:
+        self.errors.append(ErrorPrinter(message, token))
+        if self.fail_fast:
+            self.render()
+            exit(1)
+
+    def render(self) -> None:
+        if not self.errors:
+            return
+        # the lexer and the parser report as they go, which is almost but
+        # not quite source order
+        ordered: list[ErrorPrinter] = sorted(self.errors, key = lambda printer: (printer.token.filename, printer.token.start))
+        for printer in ordered[:self.limit]:
+            printer.construct_message()
+        hidden: int = len(ordered) - self.limit
+        summary: str = f"[bold]... and {hidden} more errors[/]\n" if hidden > 0 else ""
+        console().print("".join(printer.output for printer in ordered[:self.limit]) + summary)
+        self.errors.clear()
\ No newline at end of file
@@ -1,18 +1,24 @@
 # type: ignore
 # we type ignore this file because the python type checking is really bad
 from .token import Token, TokenType
+from .types import FinnType, BOOLEAN
 
-from llvmlite import ir
+# llvmlite is only needed once codegen runs, so the frontend never imports
+# it and annotations naming its types stay strings. codegen methods emit
+# through the CodeGenerator they are handed and return (ir value, finn type).
 
 
 class Expr:
     
-    def codegen(self, builder: ir.IRBuilder) -> None:...
+    def codegen(self, gen: "CodeGenerator", expected: FinnType | None = None) -> tuple:...
+    def infer(self, gen: "CodeGenerator") -> FinnType | None:...
     def pprint(self, indent: int = 0) -> None:...
     
 
     class Binary:
 
+        __slots__ = ("left", "operator", "right")
+
         def __init__(self, left, operator: Token, right) -> None: 
             self.left = left
             self.operator: Token = operator
@@ -25,9 +31,31 @@ class Expr:
             self.right.pprint(indent + 4)
             print(f"{' ' * indent})")
 
+        def infer(self, gen: "CodeGenerator") -> FinnType | None:
+            if self.operator.token_type in COMPARISON_OPERATORS:
+                return BOOLEAN
+            return self.left.infer(gen) or self.right.infer(gen)
+
+        def codegen(self, gen: "CodeGenerator", expected: FinnType | None = None) -> tuple:
+            # an untyped literal takes the type of the other operand, or of
+            # whatever the result is assigned to
+            comparison: bool = self.operator.token_type in COMPARISON_OPERATORS
+            operand_type: FinnType | None = self.left.infer(gen) or self.right.infer(gen) or (None if comparison else expected)
+
+            left: tuple = self.left.codegen(gen, operand_type)
+            right: tuple = self.right.codegen(gen, left[1])
+            gen.at(self.operator)
+            gen.check(right, left[1])
+
+            if comparison:
+                return gen.check((gen.compare(self.operator, left[0], right[0], left[1]), BOOLEAN), expected)
+            return gen.check((gen.arithmetic(self.operator, left[0], right[0], left[1]), left[1]), expected)
+
 
     class Prefix:
 
+        __slots__ = ("right", "operator")
+
         def __init__(self, right, operator: Token) -> None:
             self.right = right
             self.operator: Token = operator
@@ -38,9 +66,28 @@ class Expr:
             self.operator.pprint(indent + 4)
             print(f"{' ' * indent})")
 
+        def infer(self, gen: "CodeGenerator") -> FinnType | None:
+            return self.right.infer(gen)
+
+        def codegen(self, gen: "CodeGenerator", expected: FinnType | None = None) -> tuple:
+            gen.at(self.operator)
+            if self.operator.token_type != TokenType.MINUS:
+                gen.error(f"Operator {self.operator.lexeme} is not supported by codegen", self.operator)
+
+            # a negated number is one constant, so the most negative value of
+            # a signed type can be written
+            if isinstance(self.right, Expr.Literal) and isinstance(self.right.value, str):
+                return gen.number(self.right.value, expected, True)
+
+            value, finn_type = self.right.codegen(gen, expected)
+            gen.at(self.operator)
+            return (gen.negate(self.operator, value, finn_type), finn_type)
+
 
     class Suffix:
 
+        __slots__ = ("left", "operator")
+
         def __init__(self, left, operator: Token) -> None:
             self.left = left
             self.operator: Token = operator
@@ -51,18 +98,54 @@ class Expr:
             self.operator.pprint(indent + 4)
             print(f"{' ' * indent})")
 
+        def infer(self, gen: "CodeGenerator") -> FinnType | None:
+            return self.left.infer(gen)
+
+        def codegen(self, gen: "CodeGenerator", expected: FinnType | None = None) -> tuple:
+            gen.at(self.operator)
+            if self.operator.token_type not in (TokenType.PLUS_PLUS, TokenType.MINUS_MINUS):
+                gen.error(f"Operator {self.operator.lexeme} is not supported by codegen", self.operator)
+            if not isinstance(self.left, Expr.Variable):
+                gen.error(f"Operator {self.operator.lexeme} needs a variable", self.operator)
+
+            variable = gen.lookup(self.left.name)
+            if variable.const:
+                gen.error(f"Cannot modify constant \"{self.left.name.lexeme}\"", self.left.name)
+            return gen.check(gen.step(self.operator, variable), expected)
+
 
     class Literal:
 
-        def __init__(self, value: int | float | bool) -> None:
+        __slots__ = ("value", "type")
+
+        # the parser leaves numbers as their lexeme and untyped. constant
+        # folding produces typed literals holding the computed value.
+        def __init__(self, value: int | float | bool, type: FinnType | None = None) -> None:
             self.value: int | float | bool = value
+            self.type: FinnType | None = type
 
         def pprint(self, indent: int = 0) -> None:
             print(f"{' ' * indent}Expr.Literal({self.value})")
 
+        def infer(self, gen: "CodeGenerator") -> FinnType | None:
+            if self.type is not None:
+                return self.type
+            return BOOLEAN if isinstance(self.value, bool) else None
+
+        def codegen(self, gen: "CodeGenerator", expected: FinnType | None = None) -> tuple:
+            if self.type is not None:
+                return gen.check(gen.constant(self.type, self.value), expected)
+            if isinstance(self.value, bool):
+                return gen.check(gen.constant(BOOLEAN, self.value), expected)
+            if self.value is None:
+                gen.error("nil is not supported by codegen")
+            return gen.number(self.value, expected)
+
     
     class Grouping:
 
+        __slots__ = ("expression",)
+
         def __init__(self, expression) -> None:
             self.expression = expression
 
@@ -71,18 +154,36 @@ class Expr:
             self.expression.pprint(indent + 4)
             print(f"{' ' * indent})")
 
+        def infer(self, gen: "CodeGenerator") -> FinnType | None:
+            return self.expression.infer(gen)
+
+        def codegen(self, gen: "CodeGenerator", expected: FinnType | None = None) -> tuple:
+            return self.expression.codegen(gen, expected)
+
 
     class Variable:
 
+        __slots__ = ("name",)
+
         def __init__(self, name: Token) -> None:
             self.name: Token = name
 
         def pprint(self, indent: int = 0) -> None:
             print(f"{' ' * indent}Expr.Variable({self.name.lexeme})")
 
+        def infer(self, gen: "CodeGenerator") -> FinnType | None:
+            return gen.lookup_type(self.name)
+
+        def codegen(self, gen: "CodeGenerator", expected: FinnType | None = None) -> tuple:
+            variable = gen.lookup(self.name)
+            gen.at(self.name)
+            return gen.check((gen.builder.load(variable.pointer, name = self.name.lexeme), variable.type), expected)
+
     
     class Unwrap:
 
+        __slots__ = ("name",)
+
         def __init__(self, name: Token) -> None:
             self.name: Token = name
 
@@ -91,11 +192,19 @@ class Expr:
             self.name.pprint(indent + 4)
             print(f"{' ' * indent})")
 
+        def infer(self, gen: "CodeGenerator") -> FinnType | None:
+            return None
+
+        def codegen(self, gen: "CodeGenerator", expected: FinnType | None = None) -> tuple:
+            gen.error("Unwrapping is not supported by codegen")
+
 
 class Stmt:
 
     class Expression:
 
+        __slots__ = ("expression",)
+
         def __init__(self, expression: Expr) -> None:
             self.expression = expression
 
@@ -104,8 +213,13 @@ class Stmt:
             self.expression.pprint(indent + 4)
             print(f"{' ' * indent})")
 
+        def codegen(self, gen: "CodeGenerator") -> tuple:
+            return self.expression.codegen(gen)
+
     class If:
 
+        __slots__ = ("conditional", "then_branch", "else_branch")
+
         def __init__(self, conditional: Expr, then_branch, else_branch) -> None:
             self.conditional = conditional
             self.then_branch = then_branch
@@ -118,9 +232,24 @@ class Stmt:
             self.else_branch.pprint(indent + 4)
             print(f"{' ' * indent})")
 
+        def codegen(self, gen: "CodeGenerator") -> None:
+            # branches are a statement or a list of them, each in its own scope
+            condition, _ = self.conditional.codegen(gen, BOOLEAN)
+            if self.else_branch is None:
+                with gen.builder.if_then(condition):
+                    gen.block(self.then_branch)
+                return
+            with gen.builder.if_else(condition) as (then, otherwise):
+                with then:
+                    gen.block(self.then_branch)
+                with otherwise:
+                    gen.block(self.else_branch)
+
     
     class Assign:
 
+        __slots__ = ("name", "types", "value", "infer", "const")
+
         def __init__(self, name: Token, types: list[Token], value: Expr, infer: bool = False, const: bool = False) -> None:
             self.name = name
             self.types = types
@@ -136,8 +265,21 @@ class Stmt:
             self.value.pprint(indent + 4)
             print(f"{' ' * indent})")
 
+        def codegen(self, gen: "CodeGenerator") -> None:
+            # the name is declared after its value is emitted, so the value
+            # still sees any outer variable it shadows
+            gen.at(self.name)
+            declared: FinnType | None = gen.resolve_type(self.types) if self.types else self.value.infer(gen)
+            value: tuple = self.value.codegen(gen, declared)
+            gen.at(self.name)
+            gen.check(value, declared)
+            variable = gen.declare(self.name, value[1], self.const)
+            gen.builder.store(value[0], variable.pointer)
+
     class Reassign:
 
+        __slots__ = ("name", "value")
+
         def __init__(self, name: Token, value: Expr) -> None:
             self.name = name
             self.value = value
@@ -146,4 +288,52 @@ class Stmt:
             print(f"{' ' * indent}Stmt.Reassign(")
             print(f"{' ' * (indent + 4)}Expr.Variable({self.name.lexeme})")
             self.value.pprint(indent + 4)
-            print(f"{' ' * indent})")
\ No newline at end of file
+            print(f"{' ' * indent})")
+
+        def codegen(self, gen: "CodeGenerator") -> None:
+            gen.at(self.name)
+            variable = gen.lookup(self.name)
+            if variable.const:
+                gen.error(f"Cannot reassign constant \"{self.name.lexeme}\"", self.name)
+            value: tuple = self.value.codegen(gen, variable.type)
+            gen.at(self.name)
+            gen.check(value, variable.type)
+            gen.builder.store(value[0], variable.pointer)
+
+    class Import:
+
+        __slots__ = ("path", "names")
+
+        def __init__(self, path: list[Token], names: list[Token]) -> None:
+            self.path = path
+            self.names = names
+
+        def pprint(self, indent: int = 0) -> None:
+            names: str = f"::{{{', '.join(name.lexeme for name in self.names)}}}" if self.names else ""
+            print(f"{' ' * indent}Stmt.Import({'::'.join(segment.lexeme for segment in self.path)}{names})")
+
+        def codegen(self, gen: "CodeGenerator") -> None:
+            # imports are resolved by the project build, nothing to emit
+            return None
+
+    class Error:
+
+        # a statement the parser gave up on and skipped, kept so a partial
+        # tree still shows where it was. token is where the error was found.
+        __slots__ = ("token", "message")
+
+        def __init__(self, token: Token, message: str) -> None:
+            self.token = token
+            self.message = message
+
+        def pprint(self, indent: int = 0) -> None:
+            print(f"{' ' * indent}Stmt.Error({self.message})")
+
+        def codegen(self, gen: "CodeGenerator") -> None:
+            gen.error(self.message, self.token)
+
+
+# operators whose result is a bool whatever their operands are
+COMPARISON_OPERATORS: frozenset[TokenType] = frozenset((
+    TokenType.EQUAL_EQUAL, TokenType.NOT_EQUAL, TokenType.LT, TokenType.LT_EQUAL, TokenType.GT, TokenType.GT_EQUAL
+))
\ No newline at end of file
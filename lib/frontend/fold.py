@@ -0,0 +1,268 @@
+# type: ignore
+import math
+import struct
+
+from .token import Token, TokenType
+from .expr import Expr, Stmt, COMPARISON_OPERATORS
+from .types import FinnType, BOOLEAN, lookup_type, literal_type
+
+class ConstantFolder:
+
+    # folds operators over literals and substitutes consts whose value folds
+    # to a literal into later expressions. folded literals carry the type
+    # codegen would have given them, which is found with the same rules
+    # codegen uses: an untyped literal takes the other operand's type, then
+    # the expected type, then i64 or f64. anything that would fail or be
+    # undefined at runtime (a literal that does not fit, division by zero)
+    # is left alone so codegen reports or emits it exactly as before.
+    def __init__(self) -> None:
+        # every visible name's type, and the literal a const folded to, by
+        # symbol id
+        self.scopes: list[dict[int, tuple[FinnType | None, Expr.Literal | None]]] = [{}]
+
+        self.folded: int = 0
+        self.propagated: int = 0
+
+    def fold(self, statements: list[Stmt]) -> list[Stmt]:
+        return [self.statement(statement) for statement in statements]
+
+    # region "Scopes"
+    def lookup(self, name: Token) -> tuple[FinnType | None, Expr.Literal | None]:
+        for scope in reversed(self.scopes):
+            entry: tuple | None = scope.get(name.symbol)
+            if entry is not None:
+                return entry
+        return (None, None)
+
+    def block(self, body: list[Stmt] | Stmt | None) -> list[Stmt] | Stmt | None:
+        if body is None:
+            return None
+        self.scopes.append({})
+        folded: list[Stmt] | Stmt = [self.statement(statement) for statement in body] if isinstance(body, list) else self.statement(body)
+        self.scopes.pop()
+        return folded
+    # endregion
+
+    # region "Statements"
+    def statement(self, statement: Stmt) -> Stmt:
+        match statement:
+            case Stmt.Expression():
+                return Stmt.Expression(self.expression(statement.expression, None))
+
+            case Stmt.Assign():
+                declared: FinnType | None = self.annotation(statement.types) if statement.types else self.infer(statement.value)
+                value: Expr = self.expression(statement.value, declared)
+                finn_type: FinnType | None = declared or self.infer(value)
+                if finn_type is None and isinstance(value, Expr.Literal) and isinstance(value.value, str):
+                    finn_type = literal_type(value.value)
+
+                # only a const keeps its value, anything else can be reassigned
+                known: Expr.Literal | None = None
+                if statement.const and isinstance(value, Expr.Literal):
+                    known = self.typed(value, finn_type)
+                self.scopes[-1][statement.name.symbol] = (finn_type, known)
+                return Stmt.Assign(statement.name, statement.types, value, statement.infer, statement.const)
+
+            case Stmt.Reassign():
+                finn_type, _ = self.lookup(statement.name)
+                return Stmt.Reassign(statement.name, self.expression(statement.value, finn_type))
+
+            case Stmt.If():
+                return Stmt.If(self.expression(statement.conditional, BOOLEAN), self.block(statement.then_branch), self.block(statement.else_branch))
+
+        return statement
+
+    def annotation(self, types: list[Expr]) -> FinnType | None:
+        if len(types) != 1 or not isinstance(types[0], Expr.Variable):
+            return None
+        return lookup_type(types[0].name.lexeme)
+    # endregion
+
+    # region "Expressions"
+    def infer(self, expr: Expr) -> FinnType | None:
+        match expr:
+            case Expr.Literal():
+                if expr.type is not None:
+                    return expr.type
+                return BOOLEAN if isinstance(expr.value, bool) else None
+            case Expr.Binary():
+                if expr.operator.token_type in COMPARISON_OPERATORS:
+                    return BOOLEAN
+                return self.infer(expr.left) or self.infer(expr.right)
+            case Expr.Prefix():
+                return self.infer(expr.right)
+            case Expr.Suffix():
+                return self.infer(expr.left)
+            case Expr.Grouping():
+                return self.infer(expr.expression)
+            case Expr.Variable():
+                return self.lookup(expr.name)[0]
+        return None
+
+    def expression(self, expr: Expr, expected: FinnType | None) -> Expr:
+        match expr:
+            case Expr.Grouping():
+                # grouping only matters to the parser
+                return self.expression(expr.expression, expected)
+
+            case Expr.Variable():
+                _, known = self.lookup(expr.name)
+                if known is None:
+                    return expr
+                self.propagated += 1
+                return Expr.Literal(known.value, known.type)
+
+            case Expr.Prefix():
+                right: Expr = self.expression(expr.right, expected)
+                if expr.operator.token_type == TokenType.MINUS and isinstance(right, Expr.Literal):
+                    negated: Expr.Literal | None = self.negate(right, expected)
+                    if negated is not None:
+                        self.folded += 1
+                        return negated
+                return Expr.Prefix(right, expr.operator)
+
+            case Expr.Binary():
+                comparison: bool = expr.operator.token_type in COMPARISON_OPERATORS
+                operand_type: FinnType | None = self.infer(expr.left) or self.infer(expr.right) or (None if comparison else expected)
+                left: Expr = self.expression(expr.left, operand_type)
+                # codegen gives the right operand whatever type the left one ended up with
+                right: Expr = self.expression(expr.right, operand_type or self.infer(left) or self.default(left))
+
+                if isinstance(left, Expr.Literal) and isinstance(right, Expr.Literal):
+                    folded: Expr.Literal | None = self.binary(expr.operator, left, right, operand_type)
+                    if folded is not None:
+                        self.folded += 1
+                        return folded
+                return Expr.Binary(left, expr.operator, right)
+
+        return expr
+    # endregion
+
+    # region "Literals"
+    def default(self, expr: Expr) -> FinnType | None:
+        if isinstance(expr, Expr.Literal) and isinstance(expr.value, str):
+            return literal_type(expr.value)
+        return None
+
+    def typed(self, literal: Expr.Literal, finn_type: FinnType | None) -> Expr.Literal | None:
+        # the literal as codegen would emit it for finn_type, or None where
+        # codegen would report an error instead
+        if literal.type is not None or isinstance(literal.value, bool):
+            own: FinnType = literal.type or BOOLEAN
+            if finn_type is not None and own is not finn_type:
+                return None
+            return Expr.Literal(literal.value, own)
+        if literal.value is None:
+            return None
+
+        lexeme: str = literal.value
+        finn_type = finn_type or literal_type(lexeme)
+        if finn_type.is_bool:
+            return None
+        if finn_type.is_float:
+            return Expr.Literal(self.round(float(lexeme), finn_type), finn_type)
+        if "." in lexeme or not finn_type.fits(int(lexeme)):
+            return None
+        return Expr.Literal(int(lexeme), finn_type)
+
+    def negate(self, literal: Expr.Literal, expected: FinnType | None) -> Expr.Literal | None:
+        if literal.type is None:
+            # an untyped number is negated before the range check, the way
+            # codegen lets the most negative value of a signed type through
+            if not isinstance(literal.value, str):
+                return None
+            finn_type: FinnType = expected or literal_type(literal.value)
+            return self.typed(Expr.Literal(f"-{literal.value}"), finn_type) if not finn_type.is_bool else None
+
+        finn_type = literal.type
+        if expected is not None and finn_type is not expected:
+            return None
+        if finn_type.is_float:
+            return Expr.Literal(-literal.value, finn_type)
+        if finn_type.is_integer:
+            return Expr.Literal(finn_type.wrap(-literal.value), finn_type)
+        return None
+
+    def round(self, value: float, finn_type: FinnType) -> float:
+        # f32 arithmetic rounds every result to single precision
+        return struct.unpack("f", struct.pack("f", value))[0] if finn_type.bits == 32 else value
+
+    def binary(self, operator: Token, left: Expr.Literal, right: Expr.Literal, operand_type: FinnType | None) -> Expr.Literal | None:
+        finn_type: FinnType | None = operand_type or left.type or (BOOLEAN if isinstance(left.value, bool) else None) or self.default(left)
+        left = self.typed(left, finn_type)
+        right = self.typed(right, finn_type)
+        if left is None or right is None:
+            return None
+
+        token_type: TokenType = operator.token_type
+        a, b = left.value, right.value
+
+        if token_type in COMPARISON_OPERATORS:
+            if finn_type.is_bool and token_type not in (TokenType.EQUAL_EQUAL, TokenType.NOT_EQUAL):
+                return None
+            # ordered float comparisons are false whenever a nan is involved
+            if finn_type.is_float and (math.isnan(a) or math.isnan(b)):
+                return Expr.Literal(False, BOOLEAN)
+            return Expr.Literal(COMPARE[token_type](a, b), BOOLEAN)
+
+        if finn_type.is_bool:
+            return None
+
+        if finn_type.is_float:
+            try:
+                match token_type:
+                    case TokenType.PLUS:
+                        value: float = a + b
+                    case TokenType.MINUS:
+                        value = a - b
+                    case TokenType.MULT:
+                        value = a * b
+                    case TokenType.DIV:
+                        value = a / b
+                    case TokenType.MULT_MULT:
+                        value = math.pow(a, b)
+                    case _:
+                        return None
+            except (ZeroDivisionError, OverflowError, ValueError):
+                return None
+            return Expr.Literal(self.round(value, finn_type), finn_type)
+
+        bits: int = finn_type.bits
+        match token_type:
+            case TokenType.PLUS:
+                value: int = a + b
+            case TokenType.MINUS:
+                value = a - b
+            case TokenType.MULT:
+                value = a * b
+            case TokenType.DIV:
+                # division by zero and the one signed overflow are undefined,
+                # those stay for the runtime
+                if b == 0 or (finn_type.signed and a == finn_type.minimum() and b == -1):
+                    return None
+                value = abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+            case TokenType.MULT_MULT:
+                # the exponent is read as unsigned bits, like the emitted helper
+                value = pow(a, b & ((1 << bits) - 1), 1 << bits)
+            case TokenType.SHL:
+                value = a << (b & (bits - 1))
+            case TokenType.SHR:
+                # a signed value shifts arithmetically, an unsigned one logically
+                value = a >> (b & (bits - 1))
+            case _:
+                return None
+        return Expr.Literal(finn_type.wrap(value), finn_type)
+    # endregion
+
+
+COMPARE: dict[TokenType, object] = {
+    TokenType.EQUAL_EQUAL : lambda a, b: a == b,
+    TokenType.NOT_EQUAL   : lambda a, b: a != b,
+    TokenType.LT          : lambda a, b: a < b,
+    TokenType.LT_EQUAL    : lambda a, b: a <= b,
+    TokenType.GT          : lambda a, b: a > b,
+    TokenType.GT_EQUAL    : lambda a, b: a >= b
+}
+
+def fold(statements: list[Stmt]) -> list[Stmt]:
+    return ConstantFolder().fold(statements)
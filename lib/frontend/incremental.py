@@ -0,0 +1,314 @@
+# type: ignore
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+
+from .token import Token, TokenType
+from .source import Source
+from .lexer import Lexer
+from .parser import Parser
+from .expr import Stmt
+from .errors import Diagnostics
+from .arena import KINDS, CHILDREN, TOKENS
+
+# tokens lexed ahead of the parser while re-parsing an edit. an edit usually
+# touches one statement, so a small batch keeps the lexer from running far
+# past the point where the streams line up again.
+EDIT_BATCH: int = 16
+
+EOF: TokenType = TokenType.EOF
+
+# statements in a chunk. an edit rebuilds the chunks around it and only moves
+# the base of the ones after it, so both are about the square root of a large
+# file's statement count.
+CHUNK: int = 256
+
+class Chunk:
+
+    # a run of statements next to each other. starts are offsets from the
+    # chunk's base, the start of its first statement, so an edit before the
+    # chunk leaves them right. anchors are where each statement started when
+    # its tokens were last moved to match the text.
+    def __init__(self) -> None:
+        self.statements: list[Stmt] = []
+        self.starts: list[int] = []
+        self.anchors: list[int] = []
+        self.errors: list[list[tuple[int, int, str]]] = []
+
+
+class Document:
+
+    # a parsed file that takes text edits, for editors that re-check on every
+    # keystroke. top level statements parse independently of each other, so
+    # an edit re-lexes and re-parses from the statement before it only until
+    # the new token stream reaches a statement start the old one had past the
+    # edited text. from there both the text and the tokens are the same, so
+    # the old statements are kept as they are.
+    #
+    # an edit must not cost time proportional to the file, so statements are
+    # kept in chunks and an edit only touches the chunks it re-parses and the
+    # bases of the chunks after it. the tokens of a statement an edit moved
+    # are stale until the tree is asked for, which moves each of them once.
+    # the text itself is still spliced into a new string, a copy the lexer
+    # needs but that is cheap next to walking statements.
+    #
+    # syntax errors never stop the document, the parser recovers and leaves
+    # a Stmt.Error in the tree. each statement keeps its lexer and parser
+    # errors as offsets from its own start, so they stay right wherever an
+    # edit moves the statement.
+    def __init__(self, source: Source) -> None:
+        self.source: Source = source
+
+        self.chunks: list[Chunk] = []
+        self.bases: list[int] = []
+        self.parser: Parser | None = None
+
+        # errors the last parse found after its last statement, or in a
+        # document without any statement. offsets are absolute.
+        self.unclaimed: list[tuple[int, int, str]] = []
+
+        statements: list[Stmt] = []
+        starts: list[int] = []
+        errors: list[list[tuple[int, int, str]]] = []
+        for statement, start, found in self.parse(0):
+            statements.append(statement)
+            starts.append(start)
+            errors.append(found)
+        self.place(0, 0, statements, starts, starts, errors)
+
+    # region "Helper Functions"
+    def parse(self, start: int) -> Iterator[tuple[Stmt, int, list[tuple[int, int, str]]]]:
+        # statements from offset start on, each with the offset of its first
+        # token and its errors. the parser's current token is the next
+        # statement's first token after each one. parser errors belong to the
+        # statement they stopped, even when the token they point at is the
+        # next one's, and lexer errors to the statement whose text they are
+        # in. the lexer runs ahead, so its errors past the statement just
+        # parsed are left for the ones after.
+        lexing: Diagnostics = Diagnostics()
+        parsing: Diagnostics = Diagnostics()
+        self.parser = Parser(Lexer(self.source, start, lexing).iter_tokens(EDIT_BATCH), parsing)
+        first: int = self.parser.current.start
+        for statement in self.parser.iter_parse():
+            following: int = self.parser.current.start
+            # an error at the end of the text is on the eof token itself
+            if self.parser.current.token_type is EOF:
+                following += 1
+            errors: list[tuple[int, int, str]] = [(error.token.start - first, error.token.end - error.token.start, error.message) for error in parsing.errors]
+            parsing.errors.clear()
+            pending: list = []
+            for error in lexing.errors:
+                token: Token = error.token
+                if token.start < following:
+                    errors.append((token.start - first, token.end - token.start, error.message))
+                else:
+                    pending.append(error)
+            lexing.errors = pending
+            yield (statement, first, errors)
+            first = following
+        self.unclaimed = [(error.token.start, error.token.end - error.token.start, error.message) for error in lexing.errors]
+
+    def place(self, first: int, last: int, statements: list[Stmt], starts: list[int], anchors: list[int], errors: list[list[tuple[int, int, str]]]) -> int:
+        # replaces chunks first to last with evenly filled ones holding the
+        # statements, whose starts are absolute, and returns how many
+        pieces: int = -(-len(statements) // CHUNK)
+        size: int = -(-len(statements) // pieces) if pieces else 0
+        chunks: list[Chunk] = []
+        bases: list[int] = []
+        for index in range(0, len(statements), size or 1):
+            chunk: Chunk = Chunk()
+            base: int = starts[index]
+            chunk.statements = statements[index:index + size]
+            chunk.starts = [start - base for start in starts[index:index + size]]
+            chunk.anchors = anchors[index:index + size]
+            chunk.errors = errors[index:index + size]
+            chunks.append(chunk)
+            bases.append(base)
+        self.chunks[first:last] = chunks
+        self.bases[first:last] = bases
+        return len(chunks)
+
+    def locate(self, offset: int) -> tuple[int, int]:
+        # the chunk and index of the last statement starting before offset,
+        # or of the first statement when none does
+        chunk: int = bisect_left(self.bases, offset) - 1
+        if chunk < 0:
+            return (0, 0)
+        return (chunk, bisect_left(self.chunks[chunk].starts, offset - self.bases[chunk]) - 1)
+
+    def find(self, offset: int) -> tuple[int, int] | None:
+        # the chunk and index of the statement starting at offset
+        chunk: int = bisect_right(self.bases, offset) - 1
+        if chunk < 0:
+            return None
+        starts: list[int] = self.chunks[chunk].starts
+        index: int = bisect_left(starts, offset - self.bases[chunk])
+        if index < len(starts) and starts[index] == offset - self.bases[chunk]:
+            return (chunk, index)
+        return None
+
+    def previous(self, chunk: int, index: int) -> tuple[int, int] | None:
+        # the statement before one, which may be the last of the chunk before
+        if index > 0:
+            return (chunk, index - 1)
+        if chunk > 0:
+            return (chunk - 1, len(self.chunks[chunk - 1].statements) - 1)
+        return None
+
+    def position(self, chunk: int, index: int) -> int:
+        # the index of a statement counted over the whole document
+        return sum(len(self.chunks[k].statements) for k in range(chunk)) + index
+    # endregion
+
+    # region "Main Functions"
+    def edit(self, start: int, end: int, replacement: str) -> tuple[int, int, list[Stmt]]:
+        # replaces text[start:end] and returns where the statements changed:
+        # the index of the first one, how many old ones were dropped and the
+        # new ones put in their place
+        if not 0 <= start <= end <= len(self.source.text):
+            raise ValueError(f"edit range {start}:{end} is outside the document")
+
+        chunk, index = self.locate(start)
+        # a statement the parser recovered from was cut short by the
+        # keyword that starts the next one, so it has to be parsed again
+        # when that keyword may have changed
+        previous: tuple[int, int] | None = self.previous(chunk, index)
+        if previous is not None and isinstance(self.chunks[previous[0]].statements[previous[1]], Stmt.Error):
+            chunk, index = previous
+        restart: int = self.bases[chunk] + self.chunks[chunk].starts[index] if self.chunks else 0
+        if restart >= start:
+            restart = 0
+        # errors before the first statement's first token are in text that
+        # isn't lexed again
+        leading: list[tuple[int, int, str]] = [error for error in self.chunks[chunk].errors[index] if error[0] < 0] if restart else []
+
+        text: str = self.source.text
+        self.source.text = text[:start] + replacement + text[end:]
+        self.source.line_starts = None
+        delta: int = len(replacement) - (end - start)
+
+        # old statements are only safe to keep from a start at or after the
+        # end of the replacement, where the text has not changed
+        clean: int = start + len(replacement)
+        statements: list[Stmt] = []
+        starts: list[int] = []
+        errors: list[list[tuple[int, int, str]]] = []
+        resync: tuple[int, int] | None = None
+        for statement, offset, found in self.parse(restart):
+            statements.append(statement)
+            starts.append(offset)
+            errors.append(found)
+            token: Token = self.parser.current
+            if token.token_type is EOF:
+                break
+            if token.start >= clean:
+                resync = self.find(token.start - delta)
+                if resync is not None and resync >= (chunk, index):
+                    break
+                resync = None
+        self.parser = None
+
+        unclaimed: list[tuple[int, int, str]] = []
+        if statements:
+            errors[0] = leading + errors[0]
+        else:
+            unclaimed = [(restart + offset, size, message) for offset, size, message in leading] + self.unclaimed
+
+        if not self.chunks:
+            # a parse of the whole text, so what it left unclaimed stays so
+            if statements:
+                self.unclaimed = []
+            self.place(0, 0, statements, starts, starts, errors)
+            return (0, 0, statements)
+        self.unclaimed = []
+
+        # the statements of the chunks re-parsed that the edit left alone,
+        # before it and from where the streams lined up again
+        if resync is None:
+            resync = (len(self.chunks) - 1, len(self.chunks[-1].statements))
+        first: int = self.position(chunk, index)
+        removed: int = self.position(*resync) - first
+        head: Chunk = self.chunks[chunk]
+        tail: Chunk = self.chunks[resync[0]]
+        base: int = self.bases[chunk]
+        moved: int = self.bases[resync[0]] + delta
+        kept: list[list[tuple[int, int, str]]] = tail.errors[resync[1]:]
+        if kept and statements:
+            # text before the statement was lexed again, so its errors
+            # there have just been found again
+            kept[0] = [error for error in kept[0] if error[0] >= 0]
+        span: list[list[tuple[int, int, str]]] = head.errors[:index] + errors + kept
+        if unclaimed:
+            # what is left of the text after the statement before the edit
+            # belongs to that statement, as the eof token would
+            before: tuple[int, int] | None = self.previous(chunk, index)
+            if before is not None:
+                owner: int = self.bases[before[0]] + self.chunks[before[0]].starts[before[1]]
+                claimed: list[tuple[int, int, str]] = [(offset - owner, size, message) for offset, size, message in unclaimed]
+                if before[0] == chunk:
+                    span[index - 1] = span[index - 1] + claimed
+                else:
+                    self.chunks[before[0]].errors[before[1]] = self.chunks[before[0]].errors[before[1]] + claimed
+
+        placed: int = self.place(
+            chunk,
+            resync[0] + 1,
+            head.statements[:index] + statements + tail.statements[resync[1]:],
+            [base + offset for offset in head.starts[:index]] + starts + [moved + offset for offset in tail.starts[resync[1]:]],
+            head.anchors[:index] + starts + tail.anchors[resync[1]:],
+            span,
+        )
+        following: int = chunk + placed
+        self.bases[following:] = [base + delta for base in self.bases[following:]]
+
+        if not self.chunks:
+            # nothing to hang errors on, so they are all found again
+            for _ in self.parse(0):
+                pass
+            self.parser = None
+        return (first, removed, statements)
+
+    def offset(self, line: int, column: int) -> int:
+        # offset of a one based line and column, as editors report positions
+        return self.source.line_index()[line - 1] + column - 1
+
+    def tree(self) -> list[Stmt]:
+        # every statement with its tokens where they are now. a token is
+        # moved once even if a recovered statement shares it with the next
+        statements: list[Stmt] = []
+        moved: set[int] = set()
+        for base, chunk in zip(self.bases, self.chunks):
+            for k, start in enumerate(chunk.starts):
+                shift: int = base + start - chunk.anchors[k]
+                if shift:
+                    for token in statement_tokens(chunk.statements[k]):
+                        if id(token) not in moved:
+                            moved.add(id(token))
+                            token.start += shift
+                            token.end += shift
+                    chunk.anchors[k] = base + start
+            statements.extend(chunk.statements)
+        return statements
+
+    def diagnostics(self) -> Diagnostics:
+        # every error in the document as it is now, ready to render
+        diagnostics: Diagnostics = Diagnostics()
+        for offset, length, message in self.unclaimed:
+            diagnostics.error(message, Token(TokenType.NIL, "", TokenType.NIL, offset, offset + length, self.source))
+        for base, chunk in zip(self.bases, self.chunks):
+            for start, errors in zip(chunk.starts, chunk.errors):
+                for offset, length, message in errors:
+                    diagnostics.error(message, Token(TokenType.NIL, "", TokenType.NIL, base + start + offset, base + start + offset + length, self.source))
+        return diagnostics
+    # endregion
+
+
+def statement_tokens(statement: Stmt) -> Iterator[Token]:
+    # every token a statement's tree keeps, through the arena's child and
+    # token tables so a new node kind only has to be added there
+    stack: list[object] = [statement]
+    while stack:
+        node: object = stack.pop()
+        kind: int = KINDS[type(node)]
+        if kind in TOKENS:
+            yield TOKENS[kind](node)
+        stack.extend(CHILDREN[kind](node))
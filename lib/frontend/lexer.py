@@ -1,292 +1,356 @@
-from .token import TokenType, Token
-from .errors import ErrorPrinter
-
-class Lexer:
-
-    def __init__(self, source: str, filename: str, lines: list[str]) -> None:
-        self.source:   str = source
-        self.filename: str = filename
-        self.lines: list[str] = lines
-
-        self.index:    int = 0
-        self.start:    int = 0
-
-        self.line:     int = 1
-        self.start_cursor: int = 1
-        self.end_cursor: int = 1
-        self.cursor:   int = 1
-
-        self.keywords: dict[str, TokenType] = {
-            "import"    : TokenType.IMPORT,
-            "return"    : TokenType.RETURN,
-
-            "func"      : TokenType.FUNC,
-            "struct"    : TokenType.STRUCT,
-            "enum"      : TokenType.ENUM,
-            "class"     : TokenType.CLASS,
-            "interface" : TokenType.INTERFACE,
-
-            "type"      : TokenType.TYPE,
-            
-            "where"     : TokenType.WHERE,
-
-            "let"       : TokenType.LET,
-            "const"     : TokenType.CONST,
-
-            "while"     : TokenType.WHILE,
-            "for"       : TokenType.FOR,
-
-            "if"        : TokenType.IF,
-            "else"      : TokenType.ELSE,
-
-            "public"    : TokenType.PUBLIC,
-            "private"   : TokenType.PRIVATE,
-
-            "self"      : TokenType.SELF,
-            "new"       : TokenType.NEW,
-
-            "true"      : TokenType.TRUE,
-            "false"     : TokenType.FALSE,
-            "nil"       : TokenType.NIL
-        }
-
-        self.output:   list[Token] = []
-
-    # region "Helper Functions"
-    def at_end(self) -> bool:
-        return self.index >= len(self.source)
-    
-    def match(self, target: str) -> bool:
-        if self.at_end() or target != self.peek():
-            return False
-        else:
-            self.advance()
-            return True
-    
-    def advance(self) -> str:
-        character: str = self.source[self.index]
-        self.index += 1
-        self.end_cursor += 1
-        return character
-    
-    def peek(self) -> str:
-        if self.at_end():
-            return self.source[self.index - 1]
-        return self.source[self.index]
-    
-    def peek_next(self) -> str:
-        if self.index + 1 >= len(self.source):
-            return self.peek()
-        return self.source[self.index + 1]
-    
-    def create_token(self, token_type: TokenType, lexeme: str, token_kind: TokenType) -> None:
-        self.output.append(Token(token_type, lexeme, token_kind, (self.line, (self.start_cursor, self.end_cursor)), self.filename))
-
-    def isalpha(self, character: str) -> bool:
-        return (character >= "a" and character <= "z") or (character >= "A" and character <= "Z") or character == "_"
-    
-    def isdigit(self, character: str) -> bool:
-        try:
-            int(character)
-            return True
-        except:
-            return False
-    
-    def isalnum(self, character: str) -> bool:
-        return self.isdigit(character) or self.isalpha(character)
-    # endregion
-
-    # region "Main Functions"
-    def handle_multiline_comment(self) -> None:
-        is_looping: bool = True
-        while not self.at_end() and is_looping:
-
-            match self.peek(): 
-
-                case "*":
-                    self.advance()
-                    if self.peek() == "/":
-                        is_looping = False
-                        self.advance()
-
-                case "\n":
-                    self.line += 1
-                    self.cursor = 1
-                    self.advance()
-
-                case _:
-                    self.advance()
-
-    def number(self) -> None:
-        while not self.at_end() and self.isdigit(self.peek()):
-            self.advance()
-
-        is_float: bool = False
-
-        if self.peek() == ".":
-            is_float = True
-            while not self.at_end() or self.isdigit(self.peek()):
-                self.advance()
-
-        if is_float:
-            self.create_token(TokenType.NUMBER, self.source[self.start:self.index], TokenType.FLOAT)
-        else:
-            self.create_token(TokenType.NUMBER, self.source[self.start:self.index], TokenType.INT)
-
-    def identifier(self) -> None:
-        while not self.at_end() and self.isalnum(self.peek()):
-            self.advance()
-        
-        identifier: str = self.source[self.start:self.index]
-
-        if identifier not in self.keywords.keys():
-            self.create_token(TokenType.IDENT, identifier, TokenType.INTRINSIC)
-        else:
-            self.create_token(self.keywords[identifier], identifier, TokenType.INTRINSIC)
-
-    def lex_token(self) -> None:
-        character: str = self.advance()
-
-        match character:
-
-            case "(":
-                self.create_token(TokenType.L_PAREN, "(", TokenType.OPERATOR)
-
-            case ")":
-                self.create_token(TokenType.R_PAREN, ")", TokenType.OPERATOR)
-
-            case "[":
-                self.create_token(TokenType.L_SQUARE, "[", TokenType.OPERATOR)
-
-            case "]":
-                self.create_token(TokenType.R_SQUARE, "]", TokenType.OPERATOR)
-
-            case "{":
-                self.create_token(TokenType.L_BRACE, "(", TokenType.OPERATOR)
-
-            case "}":
-                self.create_token(TokenType.R_BRACE, "}", TokenType.OPERATOR)
-
-            case ".":
-                if self.match("."):
-                    self.create_token(TokenType.VARIADIC, "..", TokenType.OPERATOR)
-                else:
-                    self.create_token(TokenType.DOT, ".", TokenType.OPERATOR)
-
-            case "&":
-                self.create_token(TokenType.AMPERSAND, "&", TokenType.OPERATOR)
-
-            case ",":
-                self.create_token(TokenType.COMMA, ",", TokenType.OPERATOR)
-
-            case "|":
-                self.create_token(TokenType.PIPE, "|", TokenType.OPERATOR)
-
-            case "+":
-                if self.match("+"):
-                    self.create_token(TokenType.PLUS_PLUS, "++", TokenType.OPERATOR)
-                elif self.match("="):
-                    self.create_token(TokenType.PLUS_EQUAL, "+=", TokenType.OPERATOR)
-                else:
-                    self.create_token(TokenType.PLUS, "+", TokenType.OPERATOR)
-
-            case "-":
-                if self.match("-"):
-                    self.create_token(TokenType.MINUS_MINUS, "--", TokenType.OPERATOR)
-                elif self.match("="):
-                    self.create_token(TokenType.MINUS_EQUAL, "-=", TokenType.OPERATOR)
-                else:
-                    self.create_token(TokenType.MINUS, "-", TokenType.OPERATOR)
-
-            case "*":
-                if self.match("*"):
-                    self.create_token(TokenType.MULT_MULT, "**", TokenType.OPERATOR)
-                elif self.match("="):
-                    self.create_token(TokenType.MULT_EQUAL, "*=", TokenType.OPERATOR)
-                else:
-                    self.create_token(TokenType.MULT, "*", TokenType.OPERATOR)
-
-            case "/":
-                if self.match("/"):
-                    while not self.at_end() and self.peek() != "\n":
-                        self.advance()
-                    self.line += 1
-                    self.end_cursor = 1
-                elif self.match("*"):
-                    self.handle_multiline_comment()
-                elif self.match("="):
-                    self.create_token(TokenType.DIV_EQUAL, "/=", TokenType.OPERATOR)
-                else:
-                    self.create_token(TokenType.DIV, "/", TokenType.OPERATOR)
-
-            case "<":
-                if self.match("<"):
-                    self.create_token(TokenType.SHL, "<<", TokenType.OPERATOR)
-                elif self.match("="):
-                    if self.match(">"):
-                        self.create_token(TokenType.TYPE_EQUAL, "<=>", TokenType.OPERATOR)
-                    else:
-                        self.create_token(TokenType.LT_EQUAL, "<=", TokenType.OPERATOR)
-                else:
-                    self.create_token(TokenType.LT, "<", TokenType.OPERATOR)
-
-            case ">":
-                if self.match(">"):
-                    self.create_token(TokenType.SHR, ">>", TokenType.OPERATOR)
-                elif self.match("="):
-                    self.create_token(TokenType.GT_EQUAL, ">=", TokenType.OPERATOR)
-                else:
-                    self.create_token(TokenType.GT, ">", TokenType.OPERATOR)
-
-            case "!":
-                if self.match("="):
-                    self.create_token(TokenType.NOT_EQUAL, "!=", TokenType.OPERATOR)
-                else:
-                    self.create_token(TokenType.BANG, "!", TokenType.OPERATOR)
-
-            case "=":
-                if self.match("="):
-                    self.create_token(TokenType.EQUAL_EQUAL, "==", TokenType.OPERATOR)
-                elif self.match(">"):
-                    self.create_token(TokenType.FAT_ARROW, "=>", TokenType.OPERATOR)
-                else:
-                    self.create_token(TokenType.EQUAL, "=", TokenType.OPERATOR)
-
-            case "?":
-                self.create_token(TokenType.QUESTION, "?", TokenType.OPERATOR)
-
-            case ":":
-                if self.match(":"):
-                    self.create_token(TokenType.SCOPE, "::", TokenType.OPERATOR)
-                elif self.match("="):
-                    self.create_token(TokenType.COLON_EQUAL, ":=", TokenType.OPERATOR)
-                else:
-                    self.create_token(TokenType.COLON, ":", TokenType.OPERATOR)
-
-            case ";":
-                self.create_token(TokenType.SEMICOLON, ";", TokenType.OPERATOR)
-
-            case "\r" | "\t" | " ":
-                ...
-
-            case "\n":
-                self.line += 1
-                self.end_cursor = 1
-
-            case _:
-                if self.isdigit(character):
-                    self.number()
-                if self.isalpha(character):
-                    self.identifier()
-                if not (self.isalpha(character) or self.isdigit(character)):
-                    ErrorPrinter(self.lines, "Found unknown character", Token(TokenType.NIL, "", TokenType.NIL, (self.line, (self.start_cursor, self.end_cursor)), self.filename)).print_error()
-                    exit(1)
-
-    def lex(self) -> list[Token]:
-        while not self.at_end():
-            self.start = self.index
-            self.start_cursor = self.end_cursor
-            self.lex_token()
-        self.create_token(TokenType.EOF, "", TokenType.INTRINSIC)
-        return self.output
-    # endregion
\ No newline at end of file
+import gc
+import os
+import re
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterator
+
+from .token import TokenType, Token, TokenBuffer
+from .errors import Diagnostics
+from .source import Source
+
+KEYWORDS: dict[str, TokenType] = {
+    "import"    : TokenType.IMPORT,
+    "return"    : TokenType.RETURN,
+
+    "func"      : TokenType.FUNC,
+    "struct"    : TokenType.STRUCT,
+    "enum"      : TokenType.ENUM,
+    "class"     : TokenType.CLASS,
+    "interface" : TokenType.INTERFACE,
+
+    "type"      : TokenType.TYPE,
+
+    "where"     : TokenType.WHERE,
+
+    "let"       : TokenType.LET,
+    "const"     : TokenType.CONST,
+
+    "while"     : TokenType.WHILE,
+    "for"       : TokenType.FOR,
+
+    "if"        : TokenType.IF,
+    "else"      : TokenType.ELSE,
+
+    "public"    : TokenType.PUBLIC,
+    "private"   : TokenType.PRIVATE,
+
+    "self"      : TokenType.SELF,
+    "new"       : TokenType.NEW,
+
+    "true"      : TokenType.TRUE,
+    "false"     : TokenType.FALSE,
+    "nil"       : TokenType.NIL
+}
+
+OPERATORS: dict[str, TokenType] = {
+    "("   : TokenType.L_PAREN,
+    ")"   : TokenType.R_PAREN,
+    "["   : TokenType.L_SQUARE,
+    "]"   : TokenType.R_SQUARE,
+    "{"   : TokenType.L_BRACE,
+    "}"   : TokenType.R_BRACE,
+
+    "."   : TokenType.DOT,
+    ".."  : TokenType.VARIADIC,
+    "&"   : TokenType.AMPERSAND,
+    ","   : TokenType.COMMA,
+    "|"   : TokenType.PIPE,
+
+    "+"   : TokenType.PLUS,
+    "++"  : TokenType.PLUS_PLUS,
+    "+="  : TokenType.PLUS_EQUAL,
+
+    "-"   : TokenType.MINUS,
+    "--"  : TokenType.MINUS_MINUS,
+    "-="  : TokenType.MINUS_EQUAL,
+
+    "*"   : TokenType.MULT,
+    "**"  : TokenType.MULT_MULT,
+    "*="  : TokenType.MULT_EQUAL,
+
+    "/"   : TokenType.DIV,
+    "/="  : TokenType.DIV_EQUAL,
+
+    "<"   : TokenType.LT,
+    "<<"  : TokenType.SHL,
+    "<="  : TokenType.LT_EQUAL,
+    "<=>" : TokenType.TYPE_EQUAL,
+
+    ">"   : TokenType.GT,
+    ">>"  : TokenType.SHR,
+    ">="  : TokenType.GT_EQUAL,
+
+    "!"   : TokenType.BANG,
+    "!="  : TokenType.NOT_EQUAL,
+
+    "="   : TokenType.EQUAL,
+    "=="  : TokenType.EQUAL_EQUAL,
+    "=>"  : TokenType.FAT_ARROW,
+
+    "?"   : TokenType.QUESTION,
+
+    ":"   : TokenType.COLON,
+    "::"  : TokenType.SCOPE,
+    ":="  : TokenType.COLON_EQUAL,
+
+    ";"   : TokenType.SEMICOLON
+}
+
+# one alternation per lexeme class, operators ordered longest first so the
+# regex engine gives us maximal munch for free. comments must come before the
+# operators or "//" and "/*" would lex as DIV. leading blanks and newlines are
+# swallowed by every match so whitespace never costs a loop iteration of its
+# own, only comments do.
+TOKEN_PATTERN: re.Pattern = re.compile(r"[ \t\r\n]*(?:" + "|".join((
+    r"(?P<SKIP>//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))",
+    r"(?P<IDENT>[A-Za-z_][A-Za-z0-9_]*)",
+    r"(?P<NUMBER>[0-9]+(?:\.[0-9]+)?)",
+    r"(?P<OPERATOR>" + "|".join(re.escape(operator) for operator in sorted(OPERATORS, key = len, reverse = True)) + ")",
+    r"(?P<UNKNOWN>[^ \t\r\n])"
+)) + ")")
+
+# the same pattern over bytes, for mapped sources. an unknown character is a
+# whole utf-8 sequence there, so it is reported once and not once per byte.
+TOKEN_PATTERN_BYTES: re.Pattern = re.compile(TOKEN_PATTERN.pattern.replace(r"(?P<UNKNOWN>[^ \t\r\n])", r"(?P<UNKNOWN>[\xc0-\xff][\x80-\xbf]*|[^ \t\r\n])").encode())
+
+SKIP, IDENT, NUMBER = 1, 2, 3
+
+# token type and kind values for every lexeme that maps to a fixed token
+FIXED_TOKENS: dict[str, tuple[int, int]] = {
+    **{ lexeme: (token_type.value, TokenType.INTRINSIC.value) for lexeme, token_type in KEYWORDS.items() },
+    **{ lexeme: (token_type.value, TokenType.OPERATOR.value) for lexeme, token_type in OPERATORS.items() }
+}
+FIXED_TOKENS_BYTES: dict[bytes, tuple[int, int]] = { lexeme.encode(): token for lexeme, token in FIXED_TOKENS.items() }
+
+# how many tokens iter_tokens lexes ahead of the consumer
+STREAM_BATCH: int = 1024
+
+# files smaller than this lex faster on one core than it takes to start a
+# pool, and each worker gets a few chunks so a slow one doesn't hold up the rest
+PARALLEL_MIN_BYTES: int = 4 * 1024 * 1024
+CHUNKS_PER_WORKER: int = 4
+
+# how many tokens a chunk that turned out to start inside a block comment is
+# re-lexed by at a time while looking for where it meets its first lexing
+RESUME_BATCH: int = 64
+
+# blanks and comments, the only text between a chunk's last token and its end
+TRIVIA: re.Pattern = re.compile(r"[ \t\r\n]+|//[^\n]*|/\*[\s\S]*?(?:\*/|\Z)")
+TRIVIA_BYTES: re.Pattern = re.compile(TRIVIA.pattern.encode())
+
+class Lexer:
+
+    # start lets the lexer pick up at any token boundary, which is how an
+    # edited document re-lexes only the text after its last good statement.
+    # end makes it lex a chunk of the text as if the text ended there.
+    def __init__(self, source: Source, start: int = 0, diagnostics: Diagnostics | None = None, end: int | None = None) -> None:
+        self.source: Source = source
+        self.diagnostics: Diagnostics = diagnostics if diagnostics is not None else Diagnostics(fail_fast = True)
+
+        pattern: re.Pattern = TOKEN_PATTERN_BYTES if source.encoded else TOKEN_PATTERN
+        self.matches: Iterator[re.Match] = pattern.finditer(source.text, start, len(source.text) if end is None else end)
+        self.done:    bool = False
+
+        self.output:  list[Token] = []
+
+    # region "Helper Functions"
+    def unknown(self, start: int, end: int) -> None:
+        # collected diagnostics skip the character and keep lexing. in mapped
+        # bytes a character can be several bytes long.
+        self.diagnostics.error("Found unknown character", Token(TokenType.NIL, "", TokenType.NIL, start, end, self.source))
+    # endregion
+
+    # region "Main Functions"
+    def scan(self, buffer: TokenBuffer, limit: int = -1) -> bool:
+        if self.done:
+            return True
+
+        # enum attribute lookups are slow enough to show up in this loop, so
+        # tokens are written as raw values and every column append is bound
+        # to a local first. mapped sources are lexed as bytes, and lexemes
+        # are only decoded when a token is read out of the buffer.
+        encoded: bool = self.source.encoded
+        fixed: dict[str | bytes, tuple[int, int]] = FIXED_TOKENS_BYTES if encoded else FIXED_TOKENS
+        dot: str | bytes = b"." if encoded else "."
+        ident: tuple[int, int] = (TokenType.IDENT.value, TokenType.INTRINSIC.value)
+        integer: tuple[int, int] = (TokenType.NUMBER.value, TokenType.INT.value)
+        floating: tuple[int, int] = (TokenType.NUMBER.value, TokenType.FLOAT.value)
+        types, kinds, starts, ends = buffer.types.append, buffer.kinds.append, buffer.starts.append, buffer.ends.append
+        count: int = 0
+
+        for match in self.matches:
+            group: int = match.lastindex
+            lexeme: str | bytes = match.group(group)
+            start: int = match.start(group)
+
+            if group == SKIP:
+                continue
+
+            token: tuple[int, int] | None = fixed.get(lexeme)
+            if token is None:
+                if group == IDENT:
+                    token = ident
+                elif group == NUMBER:
+                    token = floating if dot in lexeme else integer
+                else:
+                    self.unknown(start, start + len(lexeme))
+                    continue
+
+            types(token[0])
+            kinds(token[1])
+            starts(start)
+            ends(start + len(lexeme))
+
+            count += 1
+            if count == limit:
+                return False
+
+        end: int = len(self.source.text)
+        buffer.append(TokenType.EOF, TokenType.INTRINSIC, end, end)
+        self.done = True
+        return True
+
+    def lex_buffer(self) -> TokenBuffer:
+        buffer: TokenBuffer = TokenBuffer(self.source)
+        self.scan(buffer)
+        return buffer
+
+    def iter_tokens(self, batch: int = STREAM_BATCH) -> Iterator[Token]:
+        buffer: TokenBuffer = TokenBuffer(self.source)
+        while True:
+            done: bool = self.scan(buffer, batch)
+            yield from buffer.tokens()
+            if done:
+                return
+            buffer.clear()
+
+    def lex(self) -> list[Token]:
+        # tokens never form reference cycles, so letting the collector rescan
+        # the growing output list on every allocation burst is pure overhead
+        collecting: bool = gc.isenabled()
+        gc.disable()
+        try:
+            self.output.extend(self.lex_buffer().tokens())
+        finally:
+            if collecting:
+                gc.enable()
+        return self.output
+    # endregion
+
+
+# region "Parallel Lexing"
+# set in every worker process, so chunks are sent as offsets into it
+shared_source: Source | None = None
+
+def share_source(text: str | None, filename: str) -> None:
+    # a mapped file is mapped again in each worker instead of being copied
+    global shared_source
+    shared_source = Source(text, filename) if text is not None else Source.map(filename)
+
+def drop_eof(buffer: TokenBuffer) -> None:
+    for column in (buffer.types, buffer.kinds, buffer.starts, buffer.ends):
+        column.pop()
+
+def open_comment(text: str | bytes, start: int, end: int) -> bool:
+    # whether the blanks and comments in text[start:end] end inside a block
+    # comment that is still open
+    encoded: bool = not isinstance(text, str)
+    pattern: re.Pattern = TRIVIA_BYTES if encoded else TRIVIA
+    match: re.Match | None = None
+    while start < end:
+        match = pattern.match(text, start, end)
+        if match is None:
+            return False
+        start = match.end()
+    if match is None:
+        return False
+    trivia: str | bytes = match.group()
+    return trivia.startswith(b"/*" if encoded else "/*") and not (len(trivia) >= 4 and trivia.endswith(b"*/" if encoded else "*/"))
+
+def lex_chunk(start: int, end: int) -> tuple[tuple[bytes, ...], list[tuple[int, int]], bool]:
+    # runs in a worker process. lexes the chunk as if nothing before it were
+    # an open block comment, and says whether the chunk leaves one open. the
+    # spans of unknown characters come back for the parent to report.
+    diagnostics: Diagnostics = Diagnostics()
+    buffer: TokenBuffer = Lexer(shared_source, start, diagnostics, end).lex_buffer()
+    drop_eof(buffer)
+    errors: list[tuple[int, int]] = [(printer.token.start, printer.token.end) for printer in diagnostics.errors]
+    tail: int = max(buffer.ends[-1] if len(buffer) else start, errors[-1][1] if errors else start)
+    columns: tuple[bytes, ...] = tuple(column.tobytes() for column in (buffer.types, buffer.kinds, buffer.starts, buffer.ends))
+    return (columns, errors, open_comment(shared_source.text, tail, end))
+
+def resume(lexer: Lexer, start: int, end: int, columns: tuple[array, ...], errors: list[tuple[int, int]], still_open: bool) -> tuple[tuple[array, ...], list[tuple[int, int]], bool]:
+    # the chunk started inside a block comment, so its real tokens start
+    # after the comment closes. lexing from there only lasts until a token
+    # starts where one of the worker's tokens did, after that both lexings
+    # are the same and the worker's is kept. errors are returned like a
+    # worker's, up to there from the re-lexing and the worker's after it.
+    source: Source = lexer.source
+    close: int = source.text.find(b"*/" if source.encoded else "*/", start, end)
+    if close == -1:
+        return (tuple(array(column.typecode) for column in columns), [], True)
+
+    diagnostics: Diagnostics = Diagnostics()
+    relexer: Lexer = Lexer(source, close + 2, diagnostics, end)
+    segment: TokenBuffer = TokenBuffer(source)
+    mine: tuple[array, ...] = (segment.types, segment.kinds, segment.starts, segment.ends)
+    starts: array = columns[2]
+    while True:
+        done: bool = relexer.scan(segment, RESUME_BATCH)
+        if done:
+            drop_eof(segment)
+        if len(segment):
+            last: int = segment.starts[-1]
+            index: int = bisect_left(starts, last)
+            if index < len(starts) and starts[index] == last:
+                found: list[tuple[int, int]] = [(printer.token.start, printer.token.end) for printer in diagnostics.errors if printer.token.start < last]
+                return (tuple(column + theirs[index + 1:] for column, theirs in zip(mine, columns)), found + [error for error in errors if error[0] > last], still_open)
+        if done:
+            found = [(printer.token.start, printer.token.end) for printer in diagnostics.errors]
+            tail: int = max(segment.ends[-1] if len(segment) else close + 2, found[-1][1] if found else close + 2)
+            return (mine, found, open_comment(source.text, tail, end))
+
+def lex_parallel(source: Source, workers: int | None = None, diagnostics: Diagnostics | None = None, chunks: int | None = None) -> TokenBuffer:
+    # lexes one big file on every core. chunks end at newlines, which only a
+    # block comment can span, so each worker lexes its chunk on the guess
+    # that it doesn't start inside one and the parent fixes up the chunks
+    # where that was wrong while putting the columns together. offsets are
+    # into the whole text from the start, nothing has to be moved.
+    text: str | bytes = source.text
+    workers = workers or os.cpu_count() or 1
+    lexer: Lexer = Lexer(source, diagnostics = diagnostics)
+    if chunks is None and (workers == 1 or len(text) < PARALLEL_MIN_BYTES):
+        return lexer.lex_buffer()
+    # only imported once a file is big enough to use it, the pool pulls in
+    # multiprocessing and friends
+    from concurrent.futures import ProcessPoolExecutor
+
+    count: int = chunks or workers * CHUNKS_PER_WORKER
+    separator: str | bytes = b"\n" if source.encoded else "\n"
+    bounds: list[int] = [0]
+    for index in range(1, count):
+        newline: int = text.find(separator, max(len(text) * index // count, bounds[-1]))
+        if newline == -1:
+            break
+        if newline + 1 < len(text):
+            bounds.append(newline + 1)
+    bounds.append(len(text))
+
+    buffer: TokenBuffer = TokenBuffer(source)
+    columns: tuple[array, ...] = (buffer.types, buffer.kinds, buffer.starts, buffer.ends)
+    inside: bool = False
+    with ProcessPoolExecutor(max_workers = workers, initializer = share_source, initargs = (None if source.encoded else text, source.filename)) as executor:
+        for start, end, (data, errors, still_open) in zip(bounds, bounds[1:], executor.map(lex_chunk, bounds, bounds[1:])):
+            chunk: tuple[array, ...] = tuple(array(column.typecode, raw) for column, raw in zip(columns, data))
+            if inside:
+                chunk, errors, still_open = resume(lexer, start, end, chunk, errors, still_open)
+            for error_start, error_end in errors:
+                lexer.unknown(error_start, error_end)
+            for column, values in zip(columns, chunk):
+                column.extend(values)
+            inside = still_open
+
+    buffer.append(TokenType.EOF, TokenType.INTRINSIC, len(text), len(text))
+    return buffer
+# endregion
@@ -0,0 +1,114 @@
+import time
+import tracemalloc
+
+class Phase:
+
+    # one timed step of the pipeline, used as a context manager. peak is the
+    # most python memory held at once while the phase ran, above what was
+    # already allocated when it started.
+    def __init__(self, metrics: "Metrics", name: str) -> None:
+        self.metrics: Metrics = metrics
+        self.name: str = name
+
+        self.wall: float = 0.0
+        self.cpu: float = 0.0
+        self.peak: int = 0
+        self.counters: dict[str, int] = {}
+
+        self.started: tuple[float, float, int] = (0.0, 0.0, 0)
+
+    def __enter__(self) -> "Phase":
+        if self.metrics.profiler:
+            self.metrics.profiler.enter(self.name)
+        if self.metrics.enabled:
+            baseline: int = 0
+            if self.metrics.memory:
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+            self.started = (time.perf_counter(), time.process_time(), baseline)
+        return self
+
+    def __exit__(self, *exception) -> None:
+        if self.metrics.enabled:
+            wall, cpu, baseline = self.started
+            self.wall = time.perf_counter() - wall
+            self.cpu = time.process_time() - cpu
+            if self.metrics.memory:
+                self.peak = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+            self.metrics.phases.append(self)
+        if self.metrics.profiler:
+            self.metrics.profiler.exit(self.name)
+
+    def count(self, **counters: int) -> None:
+        self.counters.update(counters)
+
+    def rates(self) -> dict[str, float]:
+        return { name: value / self.wall for name, value in self.counters.items() if self.wall > 0 }
+
+
+class Metrics:
+
+    # collects phases for -t. disabled metrics still hand out phases so the
+    # pipeline reads the same either way, they just record nothing. a
+    # profiler, for --profile, is switched on for exactly the span of each
+    # phase.
+    def __init__(self, enabled: bool = False, memory: bool = True, profiler: "Profiler | None" = None) -> None:
+        self.enabled: bool = enabled
+        self.memory: bool = enabled and memory
+        self.profiler: "Profiler | None" = profiler
+        self.phases: list[Phase] = []
+
+        if self.memory:
+            tracemalloc.start()
+
+    def phase(self, name: str) -> Phase:
+        return Phase(self, name)
+
+    @property
+    def detailed(self) -> bool:
+        # whether steps that normally overlap, like lexing streaming into
+        # the parser, should run one after the other to be measured apart
+        return self.enabled or self.profiler is not None
+
+    def report(self) -> str:
+        lines: list[str] = [f"{'phase':<12}{'wall ms':>10}{'cpu ms':>10}{'peak KiB':>11}  throughput"]
+        for phase in self.phases:
+            rates: str = ", ".join(f"{format_count(rate)} {name}/s" for name, rate in phase.rates().items())
+            peak: str = f"{phase.peak / 1024:>11.1f}" if self.memory else f"{'-':>11}"
+            lines.append(f"{phase.name:<12}{phase.wall * 1000:>10.2f}{phase.cpu * 1000:>10.2f}{peak}  {rates}")
+
+        wall: float = sum(phase.wall for phase in self.phases)
+        cpu: float = sum(phase.cpu for phase in self.phases)
+        lines.append(f"{'total':<12}{wall * 1000:>10.2f}{cpu * 1000:>10.2f}")
+        if self.memory:
+            lines.append("peak memory counts python allocations only, and tracing them slows every phase down")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": [
+                {
+                    "name": phase.name,
+                    "wall": phase.wall,
+                    "cpu": phase.cpu,
+                    "peak": phase.peak if self.memory else None,
+                    "counters": phase.counters,
+                    "rates": phase.rates()
+                }
+                for phase in self.phases
+            ],
+            "wall": sum(phase.wall for phase in self.phases),
+            "cpu": sum(phase.cpu for phase in self.phases)
+        }
+
+    def to_json(self) -> str:
+        import json
+
+        return json.dumps(self.to_dict(), indent = 2)
+
+
+def format_count(value: float) -> str:
+    for unit, scale in (("G", 1e9), ("M", 1e6), ("k", 1e3)):
+        if value >= scale:
+            return f"{value / scale:.2f}{unit}"
+    return f"{value:.0f}"
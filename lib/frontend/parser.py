@@ -1,20 +1,46 @@
 # type: ignore
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+
 from .token import Token, TokenType
 from .expr import Expr, Stmt
 
-from .errors import ErrorPrinter
+from .errors import Diagnostics
+
+class ParseError(Exception):
+
+    def __init__(self, message: str, token: Token) -> None:
+        super().__init__(message)
+        self.message: str = message
+        self.token: Token = token
+
 
 class Parser:
 
-    def __init__(self, tokens: list[Token], lines: list[str]) -> None:
-        self.tokens: list[Token] = tokens
-        self.lines:  list[str] = lines
+    def __init__(self, tokens: Iterable[Token], diagnostics: Diagnostics | None = None) -> None:
+        # tokens are pulled from the stream on demand, so a lexer generator can
+        # feed the parser directly and only the lookahead window stays alive.
+        # the stream always ends on EOF, which is never consumed.
+        self.tokens: Iterator[Token] = iter(tokens)
+        self.current: Token = next(self.tokens)
+        self.lookahead: deque[Token] = deque()
+        self.last: Token = None
 
         self.index:  int = 0
 
+        # errors go to the caller's diagnostics when it collects them, and the
+        # parser recovers to report every one. otherwise the first one is
+        # printed and ends the run.
+        self.diagnostics: Diagnostics = diagnostics if diagnostics is not None else Diagnostics(fail_fast = True)
+        # the token of the last error, so one mistake is reported once even
+        # if the statement after it fails on the same token
+        self.reported: Token | None = None
+
     def error(self, message: str, token: Token) -> None:
-        ErrorPrinter(self.lines, message, token).print_error()
-        exit(1)
+        if token is not self.reported:
+            self.reported = token
+            self.diagnostics.error(message, token)
+        raise ParseError(message, token)
 
     def expect(self, token_type: TokenType, message: str) -> Token:
         if self.match(token_type):
@@ -23,39 +49,90 @@ class Parser:
             self.error(message, self.previous())
 
     def at_end(self) -> bool:
-        return self.peek().token_type == TokenType.EOF
+        return self.current.token_type is EOF
     
     def match(self, *token_types: TokenType) -> bool:
-        for token_type in token_types:
-            if self.peek().token_type == token_type:
-                self.advance()
-                return True
+        if self.current.token_type in token_types:
+            self.advance()
+            return True
         return False
     
     def peek(self) -> Token:
-        return self.tokens[self.index]
+        return self.current
+
+    def peek_next(self) -> Token:
+        if not self.lookahead:
+            self.lookahead.append(next(self.tokens, self.current))
+        return self.lookahead[0]
 
     def previous(self) -> Token:
-        return self.tokens[self.index - 1]
+        return self.last
 
     def advance(self) -> Token:
-        if not self.at_end():
+        token: Token = self.current
+        if token.token_type is not EOF:
+            self.last = token
+            self.current = self.lookahead.popleft() if self.lookahead else next(self.tokens)
             self.index += 1
-        return self.previous()
+        return self.last
+
+    def synchronize(self, start: int, token: Token) -> None:
+        # skips to where the next statement most likely starts: past a
+        # semicolon or closing brace, or up to a keyword a statement can
+        # start with. at least one token goes, so a statement that fails on
+        # its first token can't fail the same way forever, and the token the
+        # error is on is never where the next statement starts.
+        if self.index == start and self.advance().token_type in SYNC_AFTER:
+            return
+        while not self.at_end():
+            token_type: TokenType = self.current.token_type
+            if token_type in SYNC_AFTER:
+                self.advance()
+                return
+            if token_type in SYNC_BEFORE and self.current is not token:
+                return
+            self.advance()
+
+    def iter_parse(self) -> Iterator[Stmt]:
+        # a statement with a syntax error, which is already in diagnostics,
+        # becomes an error node and parsing picks up after it
+        while not self.at_end():
+            start: int = self.index
+            try:
+                statement: Stmt = self.variables()
+            except ParseError as error:
+                self.synchronize(start, error.token)
+                statement = Stmt.Error(error.token, error.message)
+            yield statement
 
     def parse(self) -> list[Stmt]:
-        statements: list[Stmt] = []
-        while not self.at_end():
-            statements.append(self.variables())
-        return statements
+        return list(self.iter_parse())
     
     def variables(self) -> Stmt:
-        if self.match(TokenType.LET) or (self.peek().token_type == TokenType.IDENT and self.tokens[self.index + 1].token_type == TokenType.EQUAL):
+        if self.match(TokenType.IMPORT):
+            return self.import_decl()
+        if self.match(TokenType.LET) or (self.peek().token_type == TokenType.IDENT and self.peek_next().token_type == TokenType.EQUAL):
             return self.mutable()
         if self.match(TokenType.CONST):
             return self.immutable()
         return self.expression()
     
+    def import_decl(self) -> Stmt:
+        path: list[Token] = [self.expect(TokenType.IDENT, "Expected module name after import")]
+        names: list[Token] = []
+
+        while self.match(TokenType.SCOPE):
+            if self.match(TokenType.L_BRACE):
+                names.append(self.expect(TokenType.IDENT, "Expected name in import list"))
+                while self.match(TokenType.COMMA):
+                    names.append(self.expect(TokenType.IDENT, "Expected name in import list"))
+                self.expect(TokenType.R_BRACE, "Expected closing brace after import list")
+                break
+            path.append(self.expect(TokenType.IDENT, "Expected module name in import path"))
+
+        self.expect(TokenType.SEMICOLON, "Expected semicolon after import")
+        return Stmt.Import(path, names)
+
     def mutable(self) -> Stmt:
         name: Token = self.advance()
         if name.token_type != TokenType.IDENT:
@@ -72,15 +149,15 @@ class Parser:
             self.expect(TokenType.EQUAL, "Expected assignment operator in variable definition")
             if self.peek().token_type == TokenType.SEMICOLON:
                 self.error("Expected value in variable definition", self.peek())
-            value = self.equality()
+            value = self.binary()
             stmt = Stmt.Assign(name, types, value, False, False)
 
         elif self.match(TokenType.COLON_EQUAL):
-            value = self.equality()
+            value = self.binary()
             stmt = Stmt.Assign(name, types, value, True, False)
         
         elif self.match(TokenType.EQUAL):
-            value = self.equality()
+            value = self.binary()
             stmt = Stmt.Reassign(name, value)
 
         else:
@@ -106,11 +183,11 @@ class Parser:
             self.expect(TokenType.EQUAL, "Expected assignment operator in constant definition")
             if self.peek().token_type == TokenType.SEMICOLON:
                 self.error("Expected value in constant definition", self.peek())
-            value = self.equality()
+            value = self.binary()
             stmt = Stmt.Assign(name, types, value, False, True)
 
         elif self.match(TokenType.COLON_EQUAL):
-            value = self.equality()
+            value = self.binary()
             stmt = Stmt.Assign(name, types, value, True, True)
         elif self.match(TokenType.EQUAL):
             self.error("Cannot reassign a constant's value", self.previous())
@@ -121,107 +198,143 @@ class Parser:
         return stmt
     
     def expression(self) -> Stmt:
-        expr: Expr = self.equality()
+        expr: Expr = self.binary()
         self.expect(TokenType.SEMICOLON, "Expected semicolon after the end of an expression")
         return Stmt.Expression(expr)
     
-    def equality(self) -> Expr:
-        expr: Expr = self.comparison()
-
-        while self.match(TokenType.TYPE_EQUAL, TokenType.EQUAL_EQUAL, TokenType.NOT_EQUAL):
-            operator: Token = self.previous()
-            right: Expr = self.comparison()
-            expr = Expr.Binary(expr, operator, right)
-        
-        return expr
-    
-    def comparison(self) -> Expr:
-        expr: Expr = self.range()
-
-        while self.match(TokenType.GT, TokenType.GT_EQUAL, TokenType.LT, TokenType.LT_EQUAL):
-            operator: Token = self.previous()
-            right: Expr = self.range()
-            expr = Expr.Binary(expr, operator, right)
-
-        return expr
-    
-    def range(self) -> Expr:
-        expr: Expr = self.term()
-
-        while self.match(TokenType.VARIADIC):
-            operator: Token = self.previous()
-            right: Expr = self.term()
-            expr = Expr.Binary(expr, operator, right)
+    def binary(self, power: int = 0) -> Expr:
+        return self.operand(power, True)
 
-        return expr
-    
-    def term(self) -> Expr:
-        expr: Expr = self.factor()
+    def prefix(self) -> Expr:
+        return self.operand(0, False)
 
-        while self.match(TokenType.PLUS, TokenType.MINUS):
-            operator: Token = self.previous()
-            right: Expr = self.factor()
-            expr = Expr.Binary(expr, operator, right)
+    def operand(self, power: int, full: bool) -> Expr:
+        # groupings, pipes and prefix chains push a frame here instead of
+        # recursing, so nesting depth is bounded by memory alone and every
+        # level costs one push and one pop. a full operand takes a suffix and
+        # binary operators tighter than power, otherwise it stops at the prefix
+        # level the way type annotations and unwraps need.
+        stack: list[tuple] = []
 
-        return expr
-    
-    def factor(self) -> Expr:
-        expr: Expr = self.exp()
+        while True:
+            token: Token = self.current
+            token_type: TokenType = token.token_type
 
-        while self.match(TokenType.MULT, TokenType.DIV):
-            operator: Token = self.previous()
-            right: Expr = self.exp()
-            expr = Expr.Binary(expr, operator, right)
-
-        return expr
-    
-    def exp(self) -> Expr:
-        expr: Expr = self.suffix()
+            if token_type in PREFIX_OPERATORS:
+                self.advance()
+                stack.append((PREFIX, token))
+                continue
 
-        while self.match(TokenType.MULT_MULT):
-            operator: Token = self.previous()
-            right: Expr = self.suffix()
-            expr = Expr.Binary(expr, operator, right)
+            if token_type is L_PAREN:
+                self.advance()
+                stack.append((GROUP, power, full))
+                power, full = 0, True
+                continue
 
-        return expr
-    
-    def suffix(self) -> Expr:
-        expr: Expr = self.prefix()
-        while self.match(TokenType.PLUS_PLUS, TokenType.MINUS_MINUS, TokenType.QUESTION, TokenType.BANG):
-             operator: Token = self.previous()
-             return Expr.Suffix(expr, operator)
-        return expr
-    
-    def prefix(self) -> Expr:
-        while self.match(TokenType.MINUS, TokenType.AMPERSAND, TokenType.MULT):
-            operator: Token = self.previous()
-            return Expr.Prefix(self.prefix(), operator)
-        return self.literal()
-    
-    def literal(self) -> Expr:
-        if self.match(TokenType.NIL):
-            return Expr.Literal(None)
-        
-        if self.match(TokenType.TRUE):
-            return Expr.Literal(True)
-        
-        if self.match(TokenType.FALSE):
-            return Expr.Literal(False)
-        
-        if self.match(TokenType.NUMBER):
-            return Expr.Literal(self.previous().lexeme)
-        
-        if self.match(TokenType.PIPE):
-            expr = Expr.Unwrap(self.prefix())
-            self.expect(TokenType.PIPE, "Expected expression to be wrapped in pipes")
-            return expr
-
-        if self.match(TokenType.L_PAREN):
-            expr: Expr = self.equality()
-            self.expect(TokenType.R_PAREN, "Expected closing parenthesis")
-            return Expr.Grouping(expr)
-        
-        if self.match(TokenType.IDENT):
-            return Expr.Variable(self.previous())
-        
-        self.error("Found unexpected token", self.peek())
\ No newline at end of file
+            if token_type is PIPE:
+                self.advance()
+                stack.append((UNWRAP, power, full))
+                full = False
+                continue
+
+            parselet = LITERALS.get(token_type)
+            if parselet is None:
+                self.error("Found unexpected token", token)
+            self.advance()
+            expr: Expr = parselet(token)
+
+            # unwind every frame the finished atom completes, until the next
+            # one needs a right operand or the stack runs out
+            while True:
+                while stack and stack[-1][0] == PREFIX:
+                    expr = Expr.Prefix(expr, stack.pop()[1])
+
+                if not full:
+                    if not stack:
+                        return expr
+                    self.expect(TokenType.PIPE, "Expected expression to be wrapped in pipes")
+                    _, power, full = stack.pop()
+                    expr = Expr.Unwrap(expr)
+                    continue
+
+                operator: Token = self.current
+                if operator.token_type in SUFFIX_OPERATORS:
+                    self.advance()
+                    expr = Expr.Suffix(expr, operator)
+                    operator = self.current
+
+                # each operator tighter than the current power opens a frame
+                # for its right operand; the right operand only takes
+                # operators tighter than its own, which keeps every level
+                # left associative
+                binding: int = BINARY_POWER.get(operator.token_type, 0)
+                while binding <= power and stack and stack[-1][0] == BINARY:
+                    _, left, left_operator, power = stack.pop()
+                    expr = Expr.Binary(left, left_operator, expr)
+
+                if binding > power:
+                    self.advance()
+                    stack.append((BINARY, expr, operator, power))
+                    power = binding
+                    break
+
+                if not stack:
+                    return expr
+
+                self.expect(TokenType.R_PAREN, "Expected closing parenthesis")
+                _, power, full = stack.pop()
+                expr = Expr.Grouping(expr)
+
+
+PREFIX, GROUP, UNWRAP, BINARY = range(4)
+
+EOF: TokenType = TokenType.EOF
+L_PAREN: TokenType = TokenType.L_PAREN
+PIPE: TokenType = TokenType.PIPE
+
+# binding power of every binary operator, loosest first. anything missing
+# from the table has power 0 and ends the expression.
+BINARY_POWER: dict[TokenType, int] = {
+    TokenType.TYPE_EQUAL  : 1,
+    TokenType.EQUAL_EQUAL : 1,
+    TokenType.NOT_EQUAL   : 1,
+
+    TokenType.GT          : 2,
+    TokenType.GT_EQUAL    : 2,
+    TokenType.LT          : 2,
+    TokenType.LT_EQUAL    : 2,
+
+    TokenType.VARIADIC    : 3,
+
+    TokenType.SHL         : 4,
+    TokenType.SHR         : 4,
+
+    TokenType.PLUS        : 5,
+    TokenType.MINUS       : 5,
+
+    TokenType.MULT        : 6,
+    TokenType.DIV         : 6,
+
+    TokenType.MULT_MULT   : 7
+}
+
+# a suffix binds tighter than any binary operator but looser than a prefix
+# chain, and at most one is taken per operand
+SUFFIX_OPERATORS: frozenset[TokenType] = frozenset((TokenType.PLUS_PLUS, TokenType.MINUS_MINUS, TokenType.QUESTION, TokenType.BANG))
+
+PREFIX_OPERATORS: frozenset[TokenType] = frozenset((TokenType.MINUS, TokenType.AMPERSAND, TokenType.MULT))
+
+# error recovery resumes after these tokens, or right before the keywords that
+# start a statement. only keywords iter_parse has a rule for belong here, a
+# declaration it can't parse yet would fail again on the very token recovery
+# stopped at and report the same mistake twice.
+SYNC_AFTER: frozenset[TokenType] = frozenset((TokenType.SEMICOLON, TokenType.R_BRACE))
+SYNC_BEFORE: frozenset[TokenType] = frozenset((TokenType.IMPORT, TokenType.CONST, TokenType.LET))
+
+LITERALS: dict[TokenType, Callable[[Token], Expr]] = {
+    TokenType.IDENT   : lambda token: Expr.Variable(token),
+    TokenType.NUMBER  : lambda token: Expr.Literal(token.lexeme),
+    TokenType.TRUE    : lambda token: Expr.Literal(True),
+    TokenType.FALSE   : lambda token: Expr.Literal(False),
+    TokenType.NIL     : lambda token: Expr.Literal(None)
+}
\ No newline at end of file
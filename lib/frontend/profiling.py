@@ -0,0 +1,121 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+DEFAULT_INTERVAL: float = 0.001
+
+class Sampler:
+
+    # a stack sampling profiler on a background thread. every interval it
+    # looks at the main thread's current frame and counts the whole stack
+    # under the phase that is running, which is the collapsed stack format
+    # flamegraph tools read. it costs far less than cProfile, so its times
+    # stay close to an unprofiled run.
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        self.interval: float = interval
+        self.target: int = threading.get_ident()
+        self.section: str | None = None
+        self.stacks: dict[str, Counter[tuple[str, ...]]] = {}
+
+        self.stopped: threading.Event = threading.Event()
+        self.thread: threading.Thread = threading.Thread(target = self.run, name = "finn-sampler", daemon = True)
+        self.switch_interval: float = sys.getswitchinterval()
+
+    def start(self) -> None:
+        # the main thread only hands the gil over every switch interval, so
+        # samples can't be taken any more often than that
+        sys.setswitchinterval(min(self.switch_interval, self.interval))
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+        sys.setswitchinterval(self.switch_interval)
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            section: str | None = self.section
+            frame = sys._current_frames().get(self.target)
+            if section is None or frame is None:
+                continue
+            stack: list[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks.setdefault(section, Counter())[tuple(stack)] += 1
+
+    def collapsed(self) -> list[str]:
+        # the phase is the root frame, so each phase is its own tower
+        return [f"{';'.join((section, *stack))} {count}" for section, stacks in self.stacks.items() for stack, count in stacks.items()]
+
+
+class Profiler:
+
+    # one cProfile per pipeline phase, switched on and off by the phases
+    # themselves, so lexer and parser hotspots never mix in one table
+    def __init__(self, deterministic: bool = True, interval: float | None = None) -> None:
+        self.deterministic: bool = deterministic
+        self.sections: dict[str, cProfile.Profile] = {}
+        self.sampler: Sampler | None = Sampler(interval) if interval else None
+        if self.sampler:
+            self.sampler.start()
+
+    def enter(self, name: str) -> None:
+        if self.sampler:
+            self.sampler.section = name
+        if self.deterministic:
+            self.sections.setdefault(name, cProfile.Profile()).enable()
+
+    def exit(self, name: str) -> None:
+        if self.deterministic:
+            self.sections[name].disable()
+        if self.sampler:
+            self.sampler.section = None
+
+    def finish(self) -> None:
+        if self.sampler:
+            self.sampler.stop()
+
+    def summary(self, limit: int = 15) -> str:
+        output: io.StringIO = io.StringIO()
+        for name, profile in self.sections.items():
+            output.write(f"==== {name} ====\n")
+            pstats.Stats(profile, stream = output).sort_stats("cumulative").print_stats(limit)
+        if self.sampler:
+            for name, stacks in self.sampler.stacks.items():
+                total: int = sum(stacks.values())
+                leaves: Counter[str] = Counter()
+                for stack, count in stacks.items():
+                    leaves[stack[-1]] += count
+                output.write(f"==== {name}, {total} samples ====\n")
+                for leaf, count in leaves.most_common(limit):
+                    output.write(f"{count / total * 100:6.1f}%  {leaf}\n")
+        return output.getvalue()
+
+    def write(self, directory: str) -> list[str]:
+        # <phase>.pstats per phase plus all.pstats merging them, readable
+        # with python -m pstats or snakeviz, and profile.collapsed for
+        # flamegraph.pl or speedscope
+        os.makedirs(directory, exist_ok = True)
+        written: list[str] = []
+        for name, profile in self.sections.items():
+            path: str = os.path.join(directory, f"{name.replace(' ', '_')}.pstats")
+            profile.dump_stats(path)
+            written.append(path)
+        if self.sections:
+            merged: pstats.Stats = pstats.Stats(*self.sections.values())
+            path = os.path.join(directory, "all.pstats")
+            merged.dump_stats(path)
+            written.append(path)
+        if self.sampler:
+            path = os.path.join(directory, "profile.collapsed")
+            with open(path, "w") as file:
+                file.write("\n".join(self.sampler.collapsed()) + "\n")
+            written.append(path)
+        return written
@@ -0,0 +1,142 @@
+import os
+from functools import cache
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from .token import TokenType, Token, TokenBuffer
+from .source import Source
+from .lexer import Lexer
+from .parser import Parser
+from .arena import AstArena, IMPORT
+from .cache import DiskCache, FrontendCache
+from .errors import Diagnostics
+
+EXTENSION: str = ".finn"
+
+@cache
+def worker_cache(cache_dir: str) -> FrontendCache:
+    # one per worker process, so its disk cache keeps a running size total
+    # across every module the worker parses
+    return FrontendCache(DiskCache(cache_dir))
+
+def parse_module(filename: str, cache_dir: str | None) -> tuple[str, tuple, list[tuple[list[str], list[str]]], list[tuple[int, int, str]]]:
+    # runs in a worker process. everything sent back is a string, bytes or a
+    # tuple of them, so the result pickles as a handful of flat buffers.
+    # errors go back as offsets and messages, for the parent to render with
+    # every other module's.
+    with open(filename, "r") as file:
+        source: Source = Source(file.read(), filename)
+
+    frontend_cache: FrontendCache | None = worker_cache(cache_dir) if cache_dir else None
+    arena: AstArena | None = frontend_cache.load(source) if frontend_cache else None
+
+    errors: list[tuple[int, int, str]] = []
+    if arena is None:
+        diagnostics: Diagnostics = Diagnostics()
+        arena = AstArena(TokenBuffer(source))
+        for statement in Parser(Lexer(source, diagnostics = diagnostics).iter_tokens(), diagnostics).iter_parse():
+            arena.add(statement)
+        errors = [(error.token.start, error.token.end, error.message) for error in diagnostics.errors]
+        if frontend_cache and not errors:
+            frontend_cache.store(source, arena)
+
+    imports: list[tuple[list[str], list[str]]] = [arena.import_path(node) for node in arena.nodes(IMPORT)]
+    return (source.text, arena.dump(), imports, errors)
+
+
+class Module:
+
+    def __init__(self, filename: str, arena: AstArena, imports: list[str]) -> None:
+        self.filename: str = filename
+        self.arena: AstArena = arena
+        self.imports: list[str] = imports
+
+
+class Project:
+
+    def __init__(self, root: str, workers: int | None = None, cache_dir: str | None = None) -> None:
+        # a directory compiles every module under it, a file compiles that
+        # module and everything it imports, resolved from its directory
+        self.root: str = os.path.abspath(root if os.path.isdir(root) else os.path.dirname(root))
+        self.entries: list[str] = self.discover(root) if os.path.isdir(root) else [os.path.abspath(root)]
+        self.workers: int | None = workers
+        self.cache_dir: str | None = cache_dir
+
+        self.modules: dict[str, Module] = {}
+        self.unresolved: list[tuple[str, str]] = []
+        self.diagnostics: Diagnostics = Diagnostics()
+
+    def discover(self, directory: str) -> list[str]:
+        found: list[str] = []
+        for root, directories, names in os.walk(directory):
+            directories.sort()
+            found.extend(os.path.abspath(os.path.join(root, name)) for name in sorted(names) if name.endswith(EXTENSION))
+        return found
+
+    def resolve(self, path: list[str]) -> str | None:
+        # the longest prefix of the path that names a file is the module, so
+        # "a::b::c" is a/b/c.finn, or symbol c of a/b.finn, and so on
+        for length in range(len(path), 0, -1):
+            candidate: str = os.path.join(self.root, *path[:length]) + EXTENSION
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def compile(self) -> list[Module]:
+        # every module found so far is parsed in parallel; imports only decide
+        # which files are submitted next, never what has to wait
+        pending: dict[Future, str] = {}
+        seen: set[str] = set(self.entries)
+
+        with ProcessPoolExecutor(max_workers = self.workers) as executor:
+            for filename in self.entries:
+                pending[executor.submit(parse_module, filename, self.cache_dir)] = filename
+
+            while pending:
+                done, _ = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    filename: str = pending.pop(future)
+                    text, dumped, imports, errors = future.result()
+                    source: Source = Source(text, filename)
+                    for start, end, message in errors:
+                        self.diagnostics.error(message, Token(TokenType.NIL, "", TokenType.NIL, start, end, source))
+
+                    resolved: list[str] = []
+                    for path, _ in imports:
+                        dependency: str | None = self.resolve(path)
+                        if dependency is None:
+                            self.unresolved.append((filename, "::".join(path)))
+                            continue
+                        resolved.append(dependency)
+                        if dependency not in seen:
+                            seen.add(dependency)
+                            pending[executor.submit(parse_module, dependency, self.cache_dir)] = dependency
+
+                    self.modules[filename] = Module(filename, AstArena.load(dumped, source), resolved)
+
+        return self.order()
+
+    def order(self) -> list[Module]:
+        # dependencies before dependents. an import cycle has no valid order,
+        # so its back edge is ignored and the cycle comes out in visit order.
+        ordered: list[Module] = []
+        state: dict[str, int] = {}
+
+        for entry in sorted(self.modules):
+            if entry in state:
+                continue
+            state[entry] = 1
+            stack: list[tuple[str, int]] = [(entry, 0)]
+            while stack:
+                filename, index = stack.pop()
+                imports: list[str] = self.modules[filename].imports
+                if index < len(imports):
+                    stack.append((filename, index + 1))
+                    dependency: str = imports[index]
+                    if dependency not in state:
+                        state[dependency] = 1
+                        stack.append((dependency, 0))
+                    continue
+                state[filename] = 2
+                ordered.append(self.modules[filename])
+
+        return ordered
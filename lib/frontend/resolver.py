@@ -0,0 +1,95 @@
+# type: ignore
+from .token import Token
+from .expr import Expr, Stmt
+from .symbols import Declaration, SymbolTable
+from .errors import Diagnostics
+
+class Resolver:
+
+    # binds every name a statement reads or writes to the declaration it
+    # refers to, in one walk over the tree with the scoping rules codegen
+    # uses: a name is declared after its value, and each branch of an if is
+    # its own scope. scopes are keyed by symbol id, so a lookup hashes an
+    # int. bindings are keyed by the name's token, which folding keeps, so
+    # they still hold for the folded tree. undefined names and writes to
+    # consts are all reported together instead of codegen stopping at the
+    # first one.
+    def __init__(self, diagnostics: Diagnostics | None = None) -> None:
+        self.diagnostics: Diagnostics = diagnostics if diagnostics is not None else Diagnostics(fail_fast = True)
+        self.table: SymbolTable = SymbolTable()
+        self.bindings: dict[Token, Declaration] = {}
+
+    def resolve(self, statements: list[Stmt]) -> dict[Token, Declaration]:
+        for statement in statements:
+            self.statement(statement)
+        return self.bindings
+
+    def declaration(self, name: Token) -> Declaration | None:
+        return self.bindings.get(name)
+
+    # region "Scopes"
+    def bind(self, name: Token) -> Declaration | None:
+        declaration: Declaration | None = self.table.lookup(name.symbol)
+        if declaration is None:
+            self.diagnostics.error(f"Undefined variable \"{name.lexeme}\"", name)
+            return None
+        self.bindings[name] = declaration
+        return declaration
+
+    def block(self, body: list[Stmt] | Stmt | None) -> None:
+        if body is None:
+            return
+        self.table.push()
+        for statement in (body if isinstance(body, list) else [body]):
+            self.statement(statement)
+        self.table.pop()
+    # endregion
+
+    # region "Statements"
+    def statement(self, statement: Stmt) -> None:
+        match statement:
+            case Stmt.Expression():
+                self.expression(statement.expression)
+
+            case Stmt.Assign():
+                self.expression(statement.value)
+                self.bindings[statement.name] = self.table.declare(statement.name, statement.const)
+
+            case Stmt.Reassign():
+                declaration: Declaration | None = self.bind(statement.name)
+                if declaration is not None and declaration.const:
+                    self.diagnostics.error(f"Cannot reassign constant \"{statement.name.lexeme}\"", statement.name)
+                self.expression(statement.value)
+
+            case Stmt.If():
+                self.expression(statement.conditional)
+                self.block(statement.then_branch)
+                self.block(statement.else_branch)
+    # endregion
+
+    # region "Expressions"
+    def expression(self, expr: Expr) -> None:
+        # walks with a stack instead of recursing, the way the parser builds
+        # operands, so nesting depth is bounded by memory alone. children are
+        # pushed right to left so names still bind in source order.
+        stack: list[Expr] = [expr]
+        while stack:
+            expr = stack.pop()
+            match expr:
+                case Expr.Variable():
+                    self.bind(expr.name)
+                case Expr.Binary():
+                    stack.append(expr.right)
+                    stack.append(expr.left)
+                case Expr.Prefix():
+                    stack.append(expr.right)
+                case Expr.Suffix():
+                    if not isinstance(expr.left, Expr.Variable):
+                        stack.append(expr.left)
+                        continue
+                    declaration: Declaration | None = self.bind(expr.left.name)
+                    if declaration is not None and declaration.const:
+                        self.diagnostics.error(f"Cannot modify constant \"{expr.left.name.lexeme}\"", expr.left.name)
+                case Expr.Grouping():
+                    stack.append(expr.expression)
+    # endregion
@@ -0,0 +1,76 @@
+import mmap
+import os
+from bisect import bisect_right
+
+# files at least this big are mapped instead of read, below it a plain read
+# is cheaper than setting up the mapping
+MAP_MIN_BYTES: int = 1024 * 1024
+
+class Source:
+
+    # text is a str, or for mapped files the raw bytes of the file, which
+    # the lexer works on directly. offsets are then byte offsets, and only
+    # the lexemes that become tokens and the lines an error shows are ever
+    # decoded.
+    def __init__(self, text: str | bytes | mmap.mmap, filename: str) -> None:
+        self.text:     str | bytes | mmap.mmap = text
+        self.filename: str = filename
+        self.encoded:  bool = not isinstance(text, str)
+
+        # offsets where each line begins, only built once something asks for
+        # a line or column. files that compile cleanly never pay for it.
+        self.line_starts: list[int] | None = None
+
+    @classmethod
+    def open(cls, filename: str) -> "Source":
+        # large files are mapped so reading them costs neither a copy into a
+        # str nor decoding it, pages come in as the lexer reaches them
+        if os.path.getsize(filename) < MAP_MIN_BYTES:
+            with open(filename, "r") as file:
+                return cls(file.read(), filename)
+        return cls.map(filename)
+
+    @classmethod
+    def map(cls, filename: str) -> "Source":
+        with open(filename, "rb") as file:
+            return cls(mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ), filename)
+
+    def data(self) -> bytes | mmap.mmap:
+        # the text as bytes, for hashing. a mapped file already is.
+        return self.text if self.encoded else self.text.encode()
+
+    def line_index(self) -> list[int]:
+        if self.line_starts is None:
+            text: str | bytes | mmap.mmap = self.text
+            newline: str | bytes = b"\n" if self.encoded else "\n"
+            starts: list[int] = [0]
+            append = starts.append
+            find = text.find
+            index: int = find(newline)
+            while index != -1:
+                append(index + 1)
+                index = find(newline, index + 1)
+            self.line_starts = starts
+        return self.line_starts
+
+    def line_count(self) -> int:
+        # a trailing newline ends the last line, it doesn't start another
+        starts: list[int] = self.line_index()
+        if len(starts) > 1 and starts[-1] == len(self.text):
+            return len(starts) - 1
+        return len(starts)
+
+    def location(self, offset: int) -> tuple[int, int]:
+        starts: list[int] = self.line_index()
+        line: int = bisect_right(starts, offset)
+        if self.encoded:
+            # columns count characters, not bytes
+            return (line, len(self.text[starts[line - 1]:offset].decode(errors = "replace")) + 1)
+        return (line, offset - starts[line - 1] + 1)
+
+    def line(self, number: int) -> str:
+        starts: list[int] = self.line_index()
+        start: int = starts[number - 1]
+        end: int = starts[number] - 1 if number < len(starts) else len(self.text)
+        line: str | bytes = self.text[start:end]
+        return (line.decode(errors = "replace") if self.encoded else line).rstrip("\r")
@@ -0,0 +1,77 @@
+import threading
+
+class Interner:
+
+    # every distinct identifier gets the next integer for the life of the
+    # process, so later passes compare and hash small ints instead of
+    # strings. ids are only meaningful within one process and are never
+    # written to a cache. 0 is never handed out, it means "not an identifier".
+    def __init__(self) -> None:
+        self.ids: dict[str, int] = {}
+        self.names: list[str] = [""]
+        self.lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names) - 1
+
+    def intern(self, name: str) -> int:
+        symbol: int | None = self.ids.get(name)
+        if symbol is None:
+            # the daemon lexes on several threads, and two of them must
+            # never hand out different ids for one name
+            with self.lock:
+                symbol = self.ids.get(name)
+                if symbol is None:
+                    symbol = len(self.names)
+                    self.names.append(name)
+                    self.ids[name] = symbol
+        return symbol
+
+    def name(self, symbol: int) -> str:
+        return self.names[symbol]
+
+
+INTERNER: Interner = Interner()
+
+def intern(name: str) -> int:
+    return INTERNER.intern(name)
+
+
+class Declaration:
+
+    # one declared name. index numbers declarations in the order they were
+    # made, so per declaration data can live in a plain list.
+    __slots__ = ("symbol", "token", "const", "index")
+
+    def __init__(self, symbol: int, token: "Token", const: bool, index: int) -> None:
+        self.symbol: int = symbol
+        self.token: Token = token
+        self.const: bool = const
+        self.index: int = index
+
+
+class SymbolTable:
+
+    # nested scopes keyed by symbol id
+    def __init__(self) -> None:
+        self.scopes: list[dict[int, Declaration]] = [{}]
+        self.declarations: list[Declaration] = []
+
+    def push(self) -> None:
+        self.scopes.append({})
+
+    def pop(self) -> None:
+        self.scopes.pop()
+
+    def declare(self, token: "Token", const: bool) -> Declaration:
+        declaration: Declaration = Declaration(token.symbol, token, const, len(self.declarations))
+        self.declarations.append(declaration)
+        self.scopes[-1][token.symbol] = declaration
+        return declaration
+
+    def lookup(self, symbol: int) -> Declaration | None:
+        for scope in reversed(self.scopes):
+            declaration: Declaration | None = scope.get(symbol)
+            if declaration is not None:
+                return declaration
+        return None
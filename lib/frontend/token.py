@@ -1,6 +1,16 @@
+from array import array
+from itertools import repeat
 from enum import Enum, auto
+from collections.abc import Iterator
+
+from .source import Source
+from .symbols import INTERNER
 
 class TokenType(Enum):
+    # members are singletons, so identity hashing is exact and keeps the
+    # parser's TokenType keyed tables off the slow Enum.__hash__
+    __hash__ = object.__hash__
+
     STRING = auto()
 
     NUMBER = auto()
@@ -120,14 +130,115 @@ class TokenType(Enum):
     EOF = auto()
 
 
+# token types by value, so compact storage can keep the value and map back
+TOKEN_TYPES: list[TokenType] = [None] * (max(token_type.value for token_type in TokenType) + 1)
+for token_type in TokenType:
+    TOKEN_TYPES[token_type.value] = token_type
+
+IDENT_VALUE: int = TokenType.IDENT.value
+
+# how many tokens iterating a buffer builds at a time
+MATERIALIZE_BATCH: int = 4096
+
+
 class Token:
 
-    def __init__(self, token_type: TokenType | None, lexeme: str, token_kind: TokenType | None, position: tuple[int, tuple[int, int]], filename: str) -> None:
+    # symbol is the interned id of an identifier's name, 0 for every other
+    # token, so passes past the parser key names by int. a token buffer
+    # passes it in, any other identifier is interned here.
+    __slots__ = ("token_type", "lexeme", "token_kind", "start", "end", "source", "symbol")
+
+    def __init__(self, token_type: TokenType | None, lexeme: str, token_kind: TokenType | None, start: int, end: int, source: Source, symbol: int | None = None) -> None:
         self.token_type = token_type
         self.lexeme = lexeme
         self.token_kind = token_kind
-        self.position = position
-        self.filename = filename
+        self.start = start
+        self.end = end
+        self.source = source
+        if symbol is None:
+            symbol = INTERNER.intern(lexeme) if token_type is TokenType.IDENT else 0
+        self.symbol = symbol
+
+    @property
+    def position(self) -> tuple[int, tuple[int, int]]:
+        line, column = self.source.location(self.start)
+        width: int = self.end - self.start
+        if self.source.encoded:
+            width = len(self.source.text[self.start:self.end].decode(errors = "replace"))
+        return (line, (column, column + width))
+
+    @property
+    def filename(self) -> str:
+        return self.source.filename
 
     def pprint(self, indent: int) -> None:
-        print(f"{' ' * indent}Operator({self.lexeme})")
\ No newline at end of file
+        print(f"{' ' * indent}Operator({self.lexeme})")
+
+
+class TokenBuffer:
+
+    # one column per token field, so a token costs a handful of bytes instead
+    # of a whole object. lexemes are never stored, they are slices of source,
+    # decoded when a token is read if the source is mapped bytes. identifiers
+    # are interned as they are read, which is the first time their name
+    # exists as a string.
+    def __init__(self, source: Source) -> None:
+        self.source: Source = source
+        self.encoded: bool = source.encoded
+
+        self.types:  array = array("B")
+        self.kinds:  array = array("B")
+        self.starts: array = array("I")
+        self.ends:   array = array("I")
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        start: int = self.starts[index]
+        end: int = self.ends[index]
+        lexeme: str | bytes = self.source.text[start:end]
+        if self.encoded:
+            lexeme = lexeme.decode()
+        token_type: int = self.types[index]
+        symbol: int = INTERNER.intern(lexeme) if token_type == IDENT_VALUE else 0
+        return Token(TOKEN_TYPES[token_type], lexeme, TOKEN_TYPES[self.kinds[index]], start, end, self.source, symbol)
+
+    def __iter__(self) -> Iterator[Token]:
+        for first in range(0, len(self.types), MATERIALIZE_BATCH):
+            yield from self.tokens(first, first + MATERIALIZE_BATCH)
+
+    def tokens(self, first: int = 0, last: int | None = None) -> list[Token]:
+        # the tokens in [first, last) built column by column, which saves the
+        # per token indexing __getitem__ does
+        types: array = self.types[first:last]
+        starts: array = self.starts[first:last]
+        ends: array = self.ends[first:last]
+        text: str | bytes = self.source.text
+        lexemes: list[str] = [text[start:end] for start, end in zip(starts, ends)]
+        if self.encoded:
+            lexemes = [lexeme.decode() for lexeme in lexemes]
+        intern = INTERNER.intern
+        symbols: list[int] = [intern(lexeme) if token_type == IDENT_VALUE else 0 for token_type, lexeme in zip(types, lexemes)]
+        return list(map(Token, map(TOKEN_TYPES.__getitem__, types), lexemes, map(TOKEN_TYPES.__getitem__, self.kinds[first:last]), starts, ends, repeat(self.source), symbols))
+
+    @property
+    def filename(self) -> str:
+        return self.source.filename
+
+    def append(self, token_type: TokenType, token_kind: TokenType, start: int, end: int) -> None:
+        self.types.append(token_type.value)
+        self.kinds.append(token_kind.value)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def clear(self) -> None:
+        for column in (self.types, self.kinds, self.starts, self.ends):
+            del column[:]
+
+    def token_type(self, index: int) -> TokenType:
+        return TOKEN_TYPES[self.types[index]]
+
+    def lexeme(self, index: int) -> str:
+        lexeme: str | bytes = self.source.text[self.starts[index]:self.ends[index]]
+        return lexeme.decode() if self.encoded else lexeme
\ No newline at end of file
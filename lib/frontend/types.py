@@ -0,0 +1,104 @@
+from .token import TokenType
+
+INTEGER, FLOAT, BOOL = range(3)
+
+class FinnType:
+
+    __slots__ = ("name", "kind", "bits", "signed")
+
+    def __init__(self, name: str, kind: int, bits: int, signed: bool) -> None:
+        self.name: str = name
+        self.kind: int = kind
+        self.bits: int = bits
+        self.signed: bool = signed
+
+    def __repr__(self) -> str:
+        return self.name
+
+    @property
+    def is_integer(self) -> bool:
+        return self.kind == INTEGER
+
+    @property
+    def is_float(self) -> bool:
+        return self.kind == FLOAT
+
+    @property
+    def is_bool(self) -> bool:
+        return self.kind == BOOL
+
+    def minimum(self) -> int:
+        return -(1 << (self.bits - 1)) if self.signed else 0
+
+    def maximum(self) -> int:
+        return (1 << (self.bits - 1)) - 1 if self.signed else (1 << self.bits) - 1
+
+    def fits(self, value: int) -> bool:
+        return self.minimum() <= value <= self.maximum()
+
+    def wrap(self, value: int) -> int:
+        # two's complement truncation, the same thing the emitted integer ops do
+        value &= (1 << self.bits) - 1
+        if self.signed and value >> (self.bits - 1):
+            value -= 1 << self.bits
+        return value
+
+
+# every type codegen can lower, keyed by the width tokens. the unsized
+# spellings are aliases for the widths they default to.
+TYPES: dict[TokenType, FinnType] = {
+    TokenType.I8    : FinnType("i8", INTEGER, 8, True),
+    TokenType.I16   : FinnType("i16", INTEGER, 16, True),
+    TokenType.I32   : FinnType("i32", INTEGER, 32, True),
+    TokenType.I64   : FinnType("i64", INTEGER, 64, True),
+    TokenType.I128  : FinnType("i128", INTEGER, 128, True),
+
+    TokenType.U8    : FinnType("u8", INTEGER, 8, False),
+    TokenType.U16   : FinnType("u16", INTEGER, 16, False),
+    TokenType.U32   : FinnType("u32", INTEGER, 32, False),
+    TokenType.U64   : FinnType("u64", INTEGER, 64, False),
+    TokenType.U128  : FinnType("u128", INTEGER, 128, False),
+
+    TokenType.F32   : FinnType("f32", FLOAT, 32, True),
+    TokenType.F64   : FinnType("f64", FLOAT, 64, True),
+
+    TokenType.BOOL  : FinnType("bool", BOOL, 1, False)
+}
+TYPES[TokenType.INT] = TYPES[TokenType.I64]
+TYPES[TokenType.UINT] = TYPES[TokenType.U64]
+TYPES[TokenType.FLOAT] = TYPES[TokenType.F64]
+
+# type names reach the parser as identifiers, this maps their spelling back to
+# the width token
+TYPE_NAMES: dict[str, TokenType] = {
+    "int"   : TokenType.INT,
+    "i8"    : TokenType.I8,
+    "i16"   : TokenType.I16,
+    "i32"   : TokenType.I32,
+    "i64"   : TokenType.I64,
+    "i128"  : TokenType.I128,
+
+    "uint"  : TokenType.UINT,
+    "u8"    : TokenType.U8,
+    "u16"   : TokenType.U16,
+    "u32"   : TokenType.U32,
+    "u64"   : TokenType.U64,
+    "u128"  : TokenType.U128,
+
+    "float" : TokenType.FLOAT,
+    "f32"   : TokenType.F32,
+    "f64"   : TokenType.F64,
+
+    "bool"  : TokenType.BOOL
+}
+
+DEFAULT_INTEGER: FinnType = TYPES[TokenType.INT]
+DEFAULT_FLOAT: FinnType = TYPES[TokenType.FLOAT]
+BOOLEAN: FinnType = TYPES[TokenType.BOOL]
+
+def lookup_type(name: str) -> FinnType | None:
+    token_type: TokenType | None = TYPE_NAMES.get(name)
+    return TYPES[token_type] if token_type is not None else None
+
+def literal_type(lexeme: str) -> FinnType:
+    return DEFAULT_FLOAT if "." in lexeme else DEFAULT_INTEGER